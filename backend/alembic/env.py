@@ -9,9 +9,10 @@ from backend.core.config import settings
 from backend.db.session import Base
 # Import all models to ensure they are registered in metadata
 from backend.models.material import Material
-from backend.models.settings import Settings, Keyword
-from backend.models.batch_links import BatchLinks
+from backend.models.settings import Settings, Keyword, KeywordSetVersion
+from backend.models.batch_item import BatchItem
 from backend.models.download_archive import DownloadArchive
+from backend.models.pipeline_checkpoint import PipelineCheckpoint
 
 
 # this is the Alembic Config object, which provides
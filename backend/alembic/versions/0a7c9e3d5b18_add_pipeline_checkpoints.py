@@ -0,0 +1,42 @@
+"""add_pipeline_checkpoints
+
+Revision ID: 0a7c9e3d5b18
+Revises: f3b81c5d2a67
+Create Date: 2026-10-18 18:02:44.271950
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a7c9e3d5b18'
+down_revision = 'f3b81c5d2a67'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('pipeline_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('pipeline_version', sa.String(length=16), nullable=False),
+    sa.Column('stage', sa.String(length=32), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=True),
+    sa.Column('output', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fingerprint', 'pipeline_version', 'stage', name='uq_pipeline_checkpoints_key')
+    )
+    op.create_index(op.f('ix_pipeline_checkpoints_fingerprint'), 'pipeline_checkpoints', ['fingerprint'], unique=False)
+    op.add_column('materials', sa.Column('fingerprint', sa.String(length=64), nullable=True))
+    op.add_column('materials', sa.Column('pipeline_stage', sa.String(length=32), nullable=True))
+    op.create_index(op.f('ix_materials_fingerprint'), 'materials', ['fingerprint'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_materials_fingerprint'), table_name='materials')
+    op.drop_column('materials', 'pipeline_stage')
+    op.drop_column('materials', 'fingerprint')
+    op.drop_index(op.f('ix_pipeline_checkpoints_fingerprint'), table_name='pipeline_checkpoints')
+    op.drop_table('pipeline_checkpoints')
@@ -0,0 +1,30 @@
+"""add_keyword_set_version
+
+Revision ID: 8c1f2e7a9b34
+Revises: 37dc6a4bbfdf
+Create Date: 2026-10-18 10:12:31.408215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1f2e7a9b34'
+down_revision = '37dc6a4bbfdf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('keyword_set_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO keyword_set_version (id, version) VALUES (1, 1)")
+
+
+def downgrade() -> None:
+    op.drop_table('keyword_set_version')
@@ -0,0 +1,36 @@
+"""archive_search_indexes
+
+Revision ID: b47e0c2d9f15
+Revises: 8c1f2e7a9b34
+Create Date: 2026-10-18 14:03:52.117640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b47e0c2d9f15'
+down_revision = '8c1f2e7a9b34'
+branch_labels = None
+depends_on = None
+
+TRIGRAM_COLUMNS = ['video_id', 'title', 'uploader']
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in TRIGRAM_COLUMNS:
+        op.create_index(
+            f'ix_download_archive_{column}_trgm', 'download_archive', [column],
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+        )
+    op.create_index('ix_download_archive_downloaded_at_id', 'download_archive', ['downloaded_at', 'id'])
+    # Fresh statistics so the planner (and the row estimate used for totals) is accurate
+    op.execute("ANALYZE download_archive")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_download_archive_downloaded_at_id', table_name='download_archive')
+    for column in TRIGRAM_COLUMNS:
+        op.drop_index(f'ix_download_archive_{column}_trgm', table_name='download_archive')
@@ -0,0 +1,42 @@
+"""add_batch_items
+
+Revision ID: d29a6f41c8e0
+Revises: b47e0c2d9f15
+Create Date: 2026-10-18 15:21:07.583312
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd29a6f41c8e0'
+down_revision = 'b47e0c2d9f15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('batch_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.String(length=36), nullable=False),
+    sa.Column('url', sa.Text(), nullable=False),
+    sa.Column('url_hash', sa.String(length=40), nullable=False),
+    sa.Column('platform', sa.String(length=32), nullable=True),
+    sa.Column('status', sa.String(length=16), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('result_count', sa.Integer(), nullable=True),
+    sa.Column('flow_run_id', sa.String(length=36), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('batch_id', 'url_hash', name='uq_batch_items_batch_url')
+    )
+    op.create_index(op.f('ix_batch_items_batch_id'), 'batch_items', ['batch_id'], unique=False)
+    op.create_index(op.f('ix_batch_items_status'), 'batch_items', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_batch_items_status'), table_name='batch_items')
+    op.drop_index(op.f('ix_batch_items_batch_id'), table_name='batch_items')
+    op.drop_table('batch_items')
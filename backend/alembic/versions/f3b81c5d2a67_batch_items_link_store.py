@@ -0,0 +1,104 @@
+"""batch_items_link_store
+
+Revision ID: f3b81c5d2a67
+Revises: d29a6f41c8e0
+Create Date: 2026-10-18 16:40:12.904518
+
+"""
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b81c5d2a67'
+down_revision = 'd29a6f41c8e0'
+branch_labels = None
+depends_on = None
+
+# Frozen copies of the batch_service URL helpers as of this revision, so later
+# changes there can't alter (or break) what this migration computes
+_TRACKING_PARAMS = {"is_from_webapp", "sender_device", "sender_web_id", "web_id", "lang", "_r", "_t", "si", "feature", "share_app_id"}
+
+_PLATFORM_HOSTS = {
+    "tiktok.com": "tiktok",
+    "youtube.com": "youtube",
+    "youtu.be": "youtube",
+    "instagram.com": "instagram",
+    "douyin.com": "douyin",
+}
+
+
+def _normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k not in _TRACKING_PARAMS and not k.startswith("utm_")]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+def _url_hash(url: str) -> str:
+    return hashlib.sha1(_normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def _detect_platform(url: str) -> str:
+    host = urlsplit(url.strip()).netloc.lower()
+    for domain, platform in _PLATFORM_HOSTS.items():
+        if host == domain or host.endswith("." + domain):
+            return platform
+    return "other"
+
+
+def upgrade() -> None:
+    # One row per link instead of one row per (run, link): keep the latest
+    op.drop_constraint('uq_batch_items_batch_url', 'batch_items', type_='unique')
+    op.execute("DELETE FROM batch_items a USING batch_items b WHERE a.url_hash = b.url_hash AND a.id < b.id")
+    op.alter_column('batch_items', 'batch_id', existing_type=sa.String(length=36), nullable=True)
+    op.alter_column('batch_items', 'error', new_column_name='last_error')
+    op.add_column('batch_items', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('batch_items', sa.Column('started_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('batch_items', sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_batch_items_url_hash'), 'batch_items', ['url_hash'], unique=True)
+
+    # Move the links.txt blob into rows
+    conn = op.get_bind()
+    row = conn.execute(sa.text("SELECT content FROM batch_links WHERE id = 1")).first()
+    if row and row[0]:
+        for line in row[0].split('\n'):
+            line = line.strip()
+            if not line.startswith(('http://', 'https://')):
+                continue
+            conn.execute(
+                sa.text(
+                    "INSERT INTO batch_items (url, url_hash, platform, status, attempts) "
+                    "VALUES (:url, :url_hash, :platform, 'pending', 0) ON CONFLICT (url_hash) DO NOTHING"
+                ),
+                {"url": line, "url_hash": _url_hash(line), "platform": _detect_platform(line)}
+            )
+    op.drop_table('batch_links')
+
+
+def downgrade() -> None:
+    op.create_table('batch_links',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        "INSERT INTO batch_links (id, content) "
+        "SELECT 1, coalesce(string_agg(url, E'\\n' ORDER BY id), '') FROM batch_items"
+    )
+    op.drop_index(op.f('ix_batch_items_url_hash'), table_name='batch_items')
+    op.drop_column('batch_items', 'finished_at')
+    op.drop_column('batch_items', 'started_at')
+    op.drop_column('batch_items', 'attempts')
+    op.alter_column('batch_items', 'last_error', new_column_name='error')
+    op.execute("UPDATE batch_items SET batch_id = '' WHERE batch_id IS NULL")
+    op.alter_column('batch_items', 'batch_id', existing_type=sa.String(length=36), nullable=False)
+    op.create_unique_constraint('uq_batch_items_batch_url', 'batch_items', ['batch_id', 'url_hash'])
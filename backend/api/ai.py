@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel
+from typing import Optional
 from backend.services.ai_service import AIService, AIProviderConfig
+from backend.services.ai_cache import get_response_cache
 import logging
 
 router = APIRouter()
@@ -11,6 +13,9 @@ class AIConfigTestRequest(BaseModel):
     api_base: str
     vendor: str
     vl_model: str
+    ai_max_concurrency: int = 8
+    ai_rpm_limit: Optional[int] = None
+    ai_tpm_limit: Optional[int] = None
 
 @router.post("/test")
 async def test_ai_connection(request: AIConfigTestRequest):
@@ -22,15 +27,19 @@ async def test_ai_connection(request: AIConfigTestRequest):
             provider_name=request.vendor,
             api_base=request.api_base,
             api_key=request.api_key,
-            model_name=request.vl_model
+            model_name=request.vl_model,
+            max_concurrency=request.ai_max_concurrency,
+            rpm_limit=request.ai_rpm_limit,
+            tpm_limit=request.ai_tpm_limit
         )
         service = AIService(config)
         
         # Try a simple text generation to verify credentials
         # Using a very short prompt to minimize cost and latency
-        response = service.generate_text(
+        response = await service.generate_text(
             prompt="Hello", 
-            system_prompt="Reply with 'Hi' only."
+            system_prompt="Reply with 'Hi' only.",
+            use_cache=False
         )
         
         return {"status": "success", "message": "Connection successful", "response": response}
@@ -38,3 +47,10 @@ async def test_ai_connection(request: AIConfigTestRequest):
         logger.error(f"AI Connection Test Failed: {str(e)}")
         # Return 400 with error details so frontend can display it nicely
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/cache/stats")
+async def get_ai_cache_stats():
+    """
+    Response cache hit ratio and dollars saved, per model
+    """
+    return await get_response_cache().stats()
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks, UploadFile, File
 from backend.schemas.task import DownloadRequest
 from backend.workers.download_flow import video_download_flow
 from backend.services.batch_service import BatchService
+from backend.services.config_service import ConfigService
 from prefect.deployments import run_deployment
 from pydantic import BaseModel
 
@@ -75,45 +76,62 @@ def save_batch_content(request: BatchContentRequest):
 
 @router.post("/batch/upload")
 async def upload_batch_file(file: UploadFile = File(...)):
-    """Upload a links.txt file."""
+    """Upload a links.txt file; links not stored yet are added."""
     try:
         content = await file.read()
         text_content = content.decode('utf-8')
-        return BatchService.save_content(text_content)
+        return BatchService.import_links(text_content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/batch/run")
 def run_batch_download():
-    """Run batch download using the stored links.txt."""
+    """
+    Run batch download for every stored link that still needs downloading.
+    The links go to a single batch_download_flow run, which applies the
+    configured concurrency and per-platform limits; returns the batch id.
+    """
     try:
-        data = BatchService.get_content()
-        urls = BatchService.parse_links(data["content"])
+        # Claims pending/retryable links; already-downloaded ones are marked skipped
+        batch = BatchService.start_batch()
         
-        if not urls:
-            raise HTTPException(status_code=400, detail="No valid URLs found in batch links")
+        if not batch["count"]:
+            raise HTTPException(status_code=400, detail="No pending links in batch list")
         
-        # Submit download tasks for each URL
-        results = []
-        for url in urls:
-            try:
-                state = run_deployment(
-                    name="video_download_flow/api_triggered",
-                    parameters={"request_dict": {"url": url, "is_batch": True}},
-                    timeout=0
-                )
-                results.append({"url": url, "flow_run_id": str(state)})
-            except Exception as e:
-                results.append({"url": url, "error": str(e)})
+        settings = ConfigService.load_settings()
+        try:
+            state = run_deployment(
+                name="batch_download_flow/api_triggered",
+                parameters={
+                    "batch_id": batch["batch_id"],
+                    "max_concurrency": settings.download_concurrency,
+                    "per_platform_concurrency": settings.download_per_platform,
+                    "min_interval": settings.download_min_interval
+                },
+                timeout=0
+            )
+        except Exception:
+            BatchService.release_batch(batch["batch_id"])
+            raise
+        BatchService.set_flow_run(batch["batch_id"], str(state.id))
         
-        return {"status": "submitted", "count": len(urls), "results": results}
+        return {"status": "submitted", "flow_run_id": str(state.id), **batch}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/batch/{batch_id}/status")
+def get_batch_run_status(batch_id: str):
+    """Per-status link counts for a batch run."""
+    status = BatchService.get_batch_status(batch_id)
+    if not status["total"]:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return status
+
+
 @router.get("/batch/status")
 def get_batch_status():
     """Get batch links status."""
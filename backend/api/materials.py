@@ -95,9 +95,15 @@ def scan_files():
 # ============ Download Archive Endpoints ============
 
 @router.get("/archive")
-def get_archive_entries(skip: int = 0, limit: int = 100, search: Optional[str] = None):
-    """Get download archive entries with pagination and search."""
-    return ArchiveService.get_entries(skip=skip, limit=limit, search=search)
+def get_archive_entries(skip: int = 0, limit: int = 100, search: Optional[str] = None, cursor: Optional[str] = None):
+    """
+    Get download archive entries with pagination and search.
+    Pass `next_cursor` from the previous response as `cursor` to page without OFFSET.
+    """
+    try:
+        return ArchiveService.get_entries(skip=skip, limit=limit, search=search, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/archive/status")
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from backend.services.config_service import ConfigService
 from backend.services.storage_monitor import StorageMonitor
+from backend.services.probe_cache import probe_cache
+from backend.services.render_cache import render_cache
 from backend.core.config import get_data_dir
 from pydantic import BaseModel
 import os
@@ -68,7 +70,11 @@ def get_system_status():
             "disk": disk_usage,
             "paths": paths
         },
-        "cookies": cookies_status
+        "cookies": cookies_status,
+        "caches": {
+            "probe": probe_cache.stats(),
+            "render": render_cache.stats()
+        }
     }
 
 @router.post("/cleanup")
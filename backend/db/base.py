@@ -1,4 +1,5 @@
 from backend.db.session import Base
 from backend.models.material import Material
-from backend.models.batch_links import BatchLinks
+from backend.models.batch_item import BatchItem
 from backend.models.download_archive import DownloadArchive
+from backend.models.pipeline_checkpoint import PipelineCheckpoint
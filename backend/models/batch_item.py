@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from backend.db.session import Base
+
+
+class BatchItem(Base):
+    """
+    One batch download link (one row per distinct normalized URL) and the
+    state of its latest download attempt. Replaces the old single-row
+    links.txt blob, so large link lists can be imported incrementally and
+    summarised with aggregate queries.
+    """
+    __tablename__ = "batch_items"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(Text, nullable=False)
+    url_hash = Column(String(40), unique=True, index=True, nullable=False)  # sha1 of the normalized url
+    platform = Column(String(32), default="other")
+    status = Column(String(16), index=True, default="pending")  # pending/queued/running/done/failed/skipped
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    result_count = Column(Integer, default=0)
+    batch_id = Column(String(36), index=True, nullable=True)  # run that last picked the link up
+    flow_run_id = Column(String(36), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.sql import func
 from backend.db.session import Base
 
@@ -9,6 +9,14 @@ class DownloadArchive(Base):
     Mirrors yt-dlp's --download-archive functionality.
     """
     __tablename__ = "download_archive"
+    __table_args__ = (
+        # Substring search (ILIKE '%term%') via pg_trgm
+        Index("ix_download_archive_video_id_trgm", "video_id", postgresql_using="gin", postgresql_ops={"video_id": "gin_trgm_ops"}),
+        Index("ix_download_archive_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_download_archive_uploader_trgm", "uploader", postgresql_using="gin", postgresql_ops={"uploader": "gin_trgm_ops"}),
+        # Keyset pagination, newest first
+        Index("ix_download_archive_downloaded_at_id", "downloaded_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     video_id = Column(String(128), unique=True, index=True, nullable=False)
@@ -32,5 +32,9 @@ class Material(Base):
     ai_summary = Column(String, nullable=True)
     
     status = Column(Enum(MaterialStatus), default=MaterialStatus.PENDING)
+    
+    # Processing pipeline progress (see PipelineCheckpoint)
+    fingerprint = Column(String(64), index=True, nullable=True)
+    pipeline_stage = Column(String(32), nullable=True)  # last completed stage
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
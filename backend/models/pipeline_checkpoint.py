@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from backend.db.session import Base
+
+
+class PipelineCheckpoint(Base):
+    """
+    Output of one processing stage for one video, keyed by the video's
+    content fingerprint and the pipeline version, so re-runs can resume
+    after the last completed stage.
+    """
+    __tablename__ = "pipeline_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("fingerprint", "pipeline_version", "stage", name="uq_pipeline_checkpoints_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String(64), index=True, nullable=False)
+    pipeline_version = Column(String(16), nullable=False)
+    stage = Column(String(32), nullable=False)  # analysis / scoring / clips
+    params = Column(JSON, nullable=True)  # inputs the output depends on (ad goal, output dir, ...)
+    output = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -34,3 +34,15 @@ class Keyword(Base):
     category = Column(String, index=True) # "positive", "negative", or custom category
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class KeywordSetVersion(Base):
+    """
+    Single-row (id=1) counter bumped whenever the keyword set changes.
+    Workers and the API compare it against their compiled keyword index
+    and only reload when it moves.
+    """
+    __tablename__ = "keyword_set_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
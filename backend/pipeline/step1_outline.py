@@ -1,34 +1,65 @@
 from backend.services.ai_service import AIService
 from backend.services.video_processor import VideoProcessor
+import asyncio
+import json
+import re
 import logging
-from typing import Dict
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+
+def parse_analysis(reply: str) -> Optional[Dict]:
+    """The JSON object in a model reply, or None if there is none"""
+    match = re.search(r'\{.*\}', reply or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        result = json.loads(match.group(0))
+    except ValueError:
+        return None
+    return result if isinstance(result, dict) else None
+
+
 class Step1ContentAnalysis:
-    def __init__(self, ai_service: AIService, video_processor: VideoProcessor):
+    def __init__(self, ai_service: AIService, video_processor: VideoProcessor, max_frames: int = 8, image_mode: str = "multi"):
         self.ai = ai_service
         self.vp = video_processor
+        # At least one frame, or there is nothing to analyse
+        self.max_frames = max(1, max_frames)
+        # "multi" or "contact_sheet", see AIService.analyze_images
+        self.image_mode = image_mode
 
     async def run(self, video_path: str, ad_goal: str = None, keywords: Dict = None) -> Dict:
         """
         Extract video outline/content structure.
-        Strategy: Extract frames at intervals -> AI Vision Analysis -> Summarize
+        Strategy: Detect shots -> One frame per shot -> AI Vision Analysis -> Summarize
         """
-        # 1. Extract frames
-        # Extract 5 frames distributed throughout the video
-        frames = self.vp.extract_keyframes(video_path, num_frames=5)
-        logger.info(f"Extracted {len(frames)} frames for analysis")
-        
+        # 1. Shots and frames
+        # One representative frame per shot, merged down to the frame budget
+        # ffmpeg calls block; run them off the event loop, which may be shared with other tasks
+        shots = await asyncio.to_thread(self._select_shots, video_path)
+        frames = await asyncio.to_thread(
+            self.vp.extract_keyframes, video_path, timestamps=[(s["start"] + s["end"]) / 2 for s in shots]
+        )
+        shots, frames = self._pair_frames(shots, frames)
+        logger.info(f"Extracted {len(frames)} frames from {len(shots)} shots for analysis")
+
         # 2. AI Vision Analysis
-        
+
         # Construct Prompt based on inputs
-        base_prompt = """
+        frame_lines = "\n".join(
+            f"        Frame {i + 1}: {s['start']:.1f}s - {s['end']:.1f}s"
+            for i, s in enumerate(shots)
+        )
+        base_prompt = f"""
         Analyze this video content based on the provided frames.
+        Each frame represents one shot of the video:
+{frame_lines}
         1. Summarize the main topic.
-        2. Identify key segments/chapters with estimated timestamps (start/end) based on visual changes.
+        2. Describe the topic of each shot.
         """
-        
+
         goal_prompt = ""
         if ad_goal:
             goal_prompt = f"""
@@ -37,44 +68,41 @@ class Step1ContentAnalysis:
                - If not, set "filter_status" to "rejected".
                - Provide a "reason".
             """
-        
+
         format_prompt = """
-        4. Return JSON format with keys: 
-           "summary", "topic", "segments" (list of {start, end, topic}), 
+        4. Return JSON format with keys:
+           "summary", "topic", "segments" (list of {frame, topic}, one per frame number),
            "filter_status" (accepted/rejected), "reason".
-        Assume the video is roughly X minutes long and map frames to timeline.
         """
-        
+
         full_prompt = base_prompt + goal_prompt + format_prompt
-        
+
         try:
-            analysis = await self.ai.analyze_images(frames, prompt=full_prompt)
-            # Note: analyze_images returns a string (usually JSON string if requested).
-            
-            import json
-            import re
-            
-            # Simple cleanup to find JSON block
-            match = re.search(r'\{.*\}', analysis, re.DOTALL)
-            if match:
-                try:
-                    result = json.loads(match.group(0))
-                    
-                    # Ensure filter status fields exist
-                    if "filter_status" not in result:
-                        result["filter_status"] = "accepted" # Default to accept if AI didn't specify
-                    
-                    return result
-                except:
-                    pass
-            
+            # Unparseable replies are kept out of the AI cache, so a re-run asks the model again
+            analysis = await self.ai.analyze_images(
+                frames, prompt=full_prompt, mode=self.image_mode,
+                accept=lambda reply: parse_analysis(reply) is not None
+            )
+
+            result = parse_analysis(analysis)
+            if result is not None:
+                # Ensure filter status fields exist
+                if "filter_status" not in result:
+                    result["filter_status"] = "accepted" # Default to accept if AI didn't specify
+
+                # Timestamps come from shot detection, the model only labels them
+                result["segments"] = self._build_segments(shots, result.get("segments"))
+                return result
+
             # Fallback if no valid JSON found
             return {
                 "summary": analysis,
                 "topics": ["auto-generated"],
-                "segments": [],
+                "segments": self._build_segments(shots, None),
                 "filter_status": "accepted", # Fallback
-                "reason": "Could not parse AI response"
+                "reason": "Could not parse AI response",
+                # Degraded result: worth recomputing rather than checkpointing
+                "failed": True
             }
         except Exception as e:
             logger.error(f"AI Analysis failed: {e}")
@@ -83,5 +111,68 @@ class Step1ContentAnalysis:
                 "topics": [],
                 "segments": [],
                 "filter_status": "rejected",
-                "reason": f"Analysis failed: {str(e)}"
+                "reason": f"Analysis failed: {str(e)}",
+                "failed": True
             }
+
+    def _select_shots(self, video_path: str) -> List[Dict]:
+        """Detected shots, merged until they fit the frame budget"""
+        try:
+            shots = self.vp.detect_scenes(video_path)
+        except Exception as e:
+            logger.warning(f"Scene detection failed, sampling uniformly: {e}")
+            duration = self.vp.get_video_info(video_path)["duration"]
+            step = duration / self.max_frames
+            shots = [{"start": round(i * step, 3), "end": round((i + 1) * step, 3)} for i in range(self.max_frames)]
+
+        shots = [dict(s) for s in shots]
+        while len(shots) > self.max_frames:
+            # Fold the shortest shot into its shorter neighbour
+            i = min(range(len(shots)), key=lambda k: shots[k]["end"] - shots[k]["start"])
+            if i == 0:
+                j = 1
+            elif i == len(shots) - 1:
+                j = i - 1
+            else:
+                before = shots[i - 1]["end"] - shots[i - 1]["start"]
+                after = shots[i + 1]["end"] - shots[i + 1]["start"]
+                j = i - 1 if before <= after else i + 1
+            lo, hi = min(i, j), max(i, j)
+            shots[lo] = {"start": shots[lo]["start"], "end": shots[hi]["end"]}
+            del shots[hi]
+        return shots
+
+    def _pair_frames(self, shots: List[Dict], frames: List[bytes]):
+        """
+        Keep shots and frames one-to-one, so "Frame N" in the prompt is shot N.
+        Shots that got the same frame are merged; shots past the last frame
+        are folded into the last paired shot.
+        """
+        paired_shots, paired_frames = [], []
+        for shot, frame in zip(shots, frames):
+            if paired_frames and frame is paired_frames[-1]:
+                paired_shots[-1] = {"start": paired_shots[-1]["start"], "end": shot["end"]}
+                continue
+            paired_shots.append(dict(shot))
+            paired_frames.append(frame)
+        if paired_shots and len(frames) < len(shots):
+            paired_shots[-1]["end"] = shots[-1]["end"]
+        return paired_shots, paired_frames
+
+    def _build_segments(self, shots: List[Dict], labelled) -> List[Dict]:
+        """Attach the model's per-frame topics to the real shot timestamps"""
+        topics = {}
+        if isinstance(labelled, list):
+            for position, item in enumerate(labelled):
+                if not isinstance(item, dict):
+                    continue
+                try:
+                    index = int(item.get("frame", position + 1)) - 1
+                except (TypeError, ValueError):
+                    index = position
+                topics[index] = item.get("topic")
+
+        return [
+            {"start": shot["start"], "end": shot["end"], "topic": topics.get(i) or "unknown"}
+            for i, shot in enumerate(shots)
+        ]
@@ -1,39 +1,120 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+import asyncio
+import json
+import re
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+SCORING_SYSTEM_PROMPT = "You are a viral video expert. Output a single floating point number."
+BATCH_SCORING_SYSTEM_PROMPT = "You are a viral video expert. Output only a JSON array of numbers."
+
+def parse_score(reply: str) -> Optional[float]:
+    """First number in a reply, or None"""
+    match = re.search(r"\d+(?:\.\d+)?", reply or "")
+    return float(match.group(0)) if match else None
+
+def parse_scores(reply: str, count: int) -> Optional[List[float]]:
+    """The JSON array of `count` numbers in a reply, or None"""
+    match = re.search(r"\[.*\]", reply or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        scores = [float(v) for v in json.loads(match.group(0))]
+    except (ValueError, TypeError):
+        return None
+    return scores if len(scores) == count else None
+
 class Step3Scoring:
-    def __init__(self, ai_service):
+    def __init__(self, ai_service, max_concurrency: int = 4, mode: str = "concurrent"):
+        """
+        Args:
+            max_concurrency: Segments scored in parallel in "concurrent" mode
+            mode: "concurrent" (one request per segment) or "batch" (all segments in one request)
+        """
+        if mode not in ("concurrent", "batch"):
+            raise ValueError(f"Unknown scoring mode: {mode}")
         self.ai = ai_service
+        self.max_concurrency = max_concurrency
+        self.mode = mode
 
     async def run(self, timeline: List[Dict]) -> List[Dict]:
         """
         Score each timeline segment.
+        Each returned segment carries "score", "scoring_mode", "latency_ms" and
+        "score_fallback" (True when the model gave no usable score and the
+        neutral 5.0 was used).
         """
-        logger.info("Step 3: Scoring segments")
-        # Iterate segments and ask AI to rate them based on content/rules
-        scored_segments = []
-        for segment in timeline:
-            try:
-                topic = segment.get("topic", "unknown")
-                response = await self.ai.generate_text(
-                    prompt=f"Rate the viral potential of a video segment about '{topic}' on a scale of 0 to 10. Return ONLY the number.",
-                    system_prompt="You are a viral video expert. Output a single floating point number."
-                )
-                import re
-                match = re.search(r"[\d\.]+", response)
-                if match:
-                    score = float(match.group(0))
-                else:
-                    score = 5.0
-            except Exception as e:
-                logger.error(f"Scoring failed: {e}")
-                score = 5.0
-
-            scored_segments.append({
-                **segment,
-                "score": max(0.0, min(10.0, score))
-            })
-        
-        return scored_segments
+        logger.info(f"Step 3: Scoring {len(timeline)} segments ({self.mode})")
+        if not timeline:
+            return []
+
+        if self.mode == "batch":
+            scored = await self._score_batch(timeline)
+            if scored is not None:
+                return scored
+            logger.warning("Batch scoring response unusable, falling back to concurrent mode")
+
+        return await self._score_concurrent(timeline)
+
+    async def _score_concurrent(self, timeline: List[Dict]) -> List[Dict]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def score_one(segment: Dict) -> Dict:
+            async with semaphore:
+                started = time.monotonic()
+                fallback = False
+                try:
+                    topic = segment.get("topic", "unknown")
+                    response = await self.ai.generate_text(
+                        prompt=f"Rate the viral potential of a video segment about '{topic}' on a scale of 0 to 10. Return ONLY the number.",
+                        system_prompt=SCORING_SYSTEM_PROMPT,
+                        # Replies without a number are never cached, so a re-run asks again
+                        accept=lambda reply: parse_score(reply) is not None
+                    )
+                    score = parse_score(response)
+                    if score is None:
+                        score, fallback = 5.0, True
+                except Exception as e:
+                    logger.error(f"Scoring failed: {e}")
+                    score, fallback = 5.0, True
+                return self._scored(segment, score, "concurrent", time.monotonic() - started, fallback)
+
+        # gather keeps the timeline order
+        return list(await asyncio.gather(*(score_one(s) for s in timeline)))
+
+    async def _score_batch(self, timeline: List[Dict]) -> Optional[List[Dict]]:
+        """Score every segment in one request; returns None if the reply can't be mapped back"""
+        started = time.monotonic()
+        lines = "\n".join(f"{i + 1}. {s.get('topic', 'unknown')}" for i, s in enumerate(timeline))
+        try:
+            response = await self.ai.generate_text(
+                prompt=(
+                    "Rate the viral potential of each of these video segments on a scale of 0 to 10.\n"
+                    f"{lines}\n"
+                    f"Return ONLY a JSON array of {len(timeline)} numbers, in the same order."
+                ),
+                system_prompt=BATCH_SCORING_SYSTEM_PROMPT,
+                accept=lambda reply: parse_scores(reply, len(timeline)) is not None
+            )
+        except Exception as e:
+            logger.error(f"Batch scoring failed: {e}")
+            return None
+
+        scores = parse_scores(response, len(timeline))
+        if scores is None:
+            return None
+
+        # One round trip for all segments: each segment reports the shared latency
+        elapsed = time.monotonic() - started
+        return [self._scored(s, score, "batch", elapsed) for s, score in zip(timeline, scores)]
+
+    def _scored(self, segment: Dict, score: float, mode: str, elapsed: float, fallback: bool = False) -> Dict:
+        return {
+            **segment,
+            "score": max(0.0, min(10.0, score)),
+            "scoring_mode": mode,
+            "latency_ms": round(elapsed * 1000, 1),
+            "score_fallback": fallback
+        }
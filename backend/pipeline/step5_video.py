@@ -0,0 +1,63 @@
+from typing import List, Dict
+import asyncio
+import os
+import logging
+from backend.services.video_processor import VideoProcessor, CUT_MODES
+
+logger = logging.getLogger(__name__)
+
+# Clips shorter than this after clamping to the video are dropped
+MIN_CLIP_SEC = 0.5
+
+
+class Step5VideoGeneration:
+    def __init__(self, video_processor: VideoProcessor, mode: str = "copy"):
+        """
+        Args:
+            mode: "copy" (single stream-copy pass, keyframe-aligned cuts) or
+                  "smart" (frame-exact, re-encodes only the GOPs at cut points)
+        """
+        if mode not in CUT_MODES:
+            raise ValueError(f"Unknown cut mode: {mode}")
+        self.vp = video_processor
+        self.mode = mode
+
+    async def run(self, video_path: str, segments: List[Dict], output_dir: str) -> List[Dict]:
+        """
+        Cut the selected segments of one video into clips.
+        Each returned clip is its segment plus "index" and "output_path".
+        """
+        logger.info(f"Step 5: Cutting {len(segments)} clips from {video_path} ({self.mode})")
+        return await asyncio.to_thread(self._cut, video_path, segments, output_dir)
+
+    def _cut(self, video_path: str, segments: List[Dict], output_dir: str) -> List[Dict]:
+        clips = self._plan_clips(video_path, segments, output_dir)
+        if not clips:
+            return []
+        os.makedirs(output_dir, exist_ok=True)
+        self.vp.cut_segments(video_path, clips, mode=self.mode)
+        return clips
+
+    def _plan_clips(self, video_path: str, segments: List[Dict], output_dir: str) -> List[Dict]:
+        """Clamp segments to the video and assign output paths"""
+        duration = self.vp.get_video_info(video_path)['duration']
+        stem, ext = os.path.splitext(os.path.basename(video_path))
+        # Stream copy keeps the source codecs, so keep its container too
+        ext = ext if self.mode == "copy" and ext else ".mp4"
+
+        clips = []
+        for seg in sorted(segments, key=lambda s: s['start']):
+            start = max(0.0, float(seg['start']))
+            end = min(duration, float(seg['end'])) if duration else float(seg['end'])
+            if end - start < MIN_CLIP_SEC:
+                logger.warning(f"Skipping segment {seg['start']}-{seg['end']} of {video_path}: too short")
+                continue
+            index = len(clips) + 1
+            clips.append({
+                **seg,
+                "start": start,
+                "end": end,
+                "index": index,
+                "output_path": os.path.join(output_dir, f"{stem}_clip{index:02d}{ext}")
+            })
+        return clips
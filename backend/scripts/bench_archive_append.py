@@ -0,0 +1,55 @@
+import sys
+import os
+import time
+import argparse
+import tempfile
+import logging
+
+# Add backend to sys.path if running from root
+if os.getcwd() not in sys.path:
+    sys.path.append(os.getcwd())
+
+from backend.services.archive_file import ArchiveFileWriter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="archive.txt add latency vs. archive size")
+    parser.add_argument("--sizes", default="0,10000,100000,1000000", help="Archive sizes to measure at")
+    parser.add_argument("--samples", type=int, default=2000, help="Appends timed per size")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_archive_")
+    path = os.path.join(work_dir, "archive.txt")
+    writer = ArchiveFileWriter(path)
+
+    print(f"{'entries':>9} | {'append p50 (us)':>15} | {'append p99 (us)':>15} | {'full rewrite (ms)':>17}")
+    print("-" * 66)
+    for size in [int(s) for s in args.sizes.split(",")]:
+        # Seed the file, timing the full rewrite every add used to cost
+        started = time.perf_counter()
+        writer.rewrite(("tiktok", f"{i:019d}") for i in range(size))
+        rewrite_ms = (time.perf_counter() - started) * 1000
+
+        samples = []
+        for i in range(args.samples):
+            started = time.perf_counter()
+            writer.append("tiktok", f"bench{size}_{i}")
+            samples.append((time.perf_counter() - started) * 1e6)
+        writer.sync()
+
+        print(f"{size:>9} | {percentile(samples, 50):>15.1f} | {percentile(samples, 99):>15.1f} | {rewrite_ms:>17.1f}")
+
+    writer.remove()
+    os.rmdir(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys
+import os
+import time
+import argparse
+import tempfile
+import logging
+
+import ffmpeg
+
+# Add backend to sys.path if running from root
+if os.getcwd() not in sys.path:
+    sys.path.append(os.getcwd())
+
+from backend.services.video_processor import VideoProcessor
+from backend.services.render_cache import RenderCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def make_sample(path: str, duration: int) -> None:
+    """Render a synthetic 1080p30 source with a 2s GOP, similar to creator uploads."""
+    logger.info(f"Generating {duration}s 1080p sample at {path}...")
+    video = ffmpeg.input(f"testsrc2=size=1920x1080:rate=30:duration={duration}", f="lavfi")
+    audio = ffmpeg.input(f"sine=frequency=440:duration={duration}", f="lavfi")
+    (
+        ffmpeg
+        .output(video, audio, path, vcodec="libx264", preset="veryfast", g=60, acodec="aac")
+        .run(overwrite_output=True, quiet=True)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wall-clock benchmark for chunked convert_to_format")
+    parser.add_argument("--input", help="Source video (default: synthetic 10-minute 1080p clip)")
+    parser.add_argument("--duration", type=int, default=600, help="Synthetic sample length in seconds")
+    parser.add_argument("--ratio", default="9:16")
+    parser.add_argument("--strategy", default="blur_bg")
+    parser.add_argument("--chunks", default="1,4,16", help="Comma-separated chunk counts to compare")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_chunked_")
+    input_path = args.input
+    if not input_path:
+        input_path = os.path.join(work_dir, "sample_1080p.mp4")
+        make_sample(input_path, args.duration)
+
+    # The chunks=1 baseline goes through convert_to_format; keep the render cache
+    # out of it so every configuration pays for a real encode
+    vp = VideoProcessor(render_cache=RenderCache(enabled=False))
+    rows = []
+    for chunks in [int(c) for c in args.chunks.split(",")]:
+        output_path = os.path.join(work_dir, f"out_{chunks}.mp4")
+        started = time.monotonic()
+        vp.convert_to_format_chunked(input_path, output_path, args.ratio, args.strategy, chunks=chunks)
+        elapsed = time.monotonic() - started
+        rows.append((chunks, elapsed))
+        logger.info(f"chunks={chunks}: {elapsed:.1f}s")
+
+    baseline = rows[0][1]
+    print(f"\n{'chunks':>6} | {'wall-clock (s)':>14} | {'speedup':>7}")
+    print("-" * 34)
+    for chunks, elapsed in rows:
+        print(f"{chunks:>6} | {elapsed:>14.1f} | {baseline / elapsed:>6.2f}x")
+    print(f"\ncpu_count={os.cpu_count()}, outputs in {work_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import sys
+import os
+import time
+import asyncio
+import argparse
+import logging
+
+# Add backend to sys.path if running from root
+if os.getcwd() not in sys.path:
+    sys.path.append(os.getcwd())
+
+from backend.services.ai_service import get_provider_pool
+from backend.services.config_service import SettingsModel
+from backend.workers.container import ServiceContainer, run_async, loop_runner
+
+logging.basicConfig(level=logging.WARNING)
+
+
+async def touch_provider(container: ServiceContainer):
+    """What every AI-bound task does first: get an HTTP client pool for the provider"""
+    get_provider_pool(container.ai.config)
+
+
+def per_task_fresh(settings: SettingsModel):
+    # Previous behaviour: new services and a new event loop per task
+    container = ServiceContainer(settings, "bench")
+    asyncio.run(touch_provider(container))
+
+
+def per_task_shared(container: ServiceContainer):
+    run_async(touch_provider(container))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-task setup overhead: fresh services + asyncio.run vs. shared container + persistent loop")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    settings = SettingsModel(api_key="bench")
+    container = ServiceContainer(settings, "bench")
+    per_task_shared(container)  # warm up the loop
+
+    for name, fn in [("fresh services + asyncio.run", lambda: per_task_fresh(settings)),
+                     ("shared container + loop runner", lambda: per_task_shared(container))]:
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            fn()
+        per_task_ms = (time.perf_counter() - started) * 1000 / args.iterations
+        print(f"{name:<32} {per_task_ms:8.3f} ms/task")
+
+    loop_runner.close()
+
+
+if __name__ == "__main__":
+    main()
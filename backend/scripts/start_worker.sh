@@ -8,6 +8,7 @@ sleep 10
 # This ensures flows are available to the worker
 echo "Registering flows..."
 python -c "from backend.workers.download_flow import video_download_flow; video_download_flow.to_deployment(name='api_triggered').apply()"
+python -c "from backend.workers.download_flow import batch_download_flow; batch_download_flow.to_deployment(name='api_triggered').apply()"
 
 # Start the worker
 echo "Starting Prefect Worker..."
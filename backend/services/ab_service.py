@@ -1,19 +1,32 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
 from backend.services.video_processor import VideoProcessor
 import os
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+class VariantResult(BaseModel):
+    name: str
+    ratio: str
+    strategy: str
+    output_path: str
+    status: str  # "success" or "failed"
+    error: Optional[str] = None
+    elapsed_sec: float = 0.0
+
 class ABVariantService:
-    def __init__(self, video_processor: VideoProcessor, output_dir: str = "/app/data/output"):
+    def __init__(self, video_processor: VideoProcessor, output_dir: str = "/app/data/output", max_workers: int = 1):
         self.vp = video_processor
         self.output_dir = output_dir
+        self.max_workers = max_workers
 
-    def generate_variants(self, input_path: str, variants_config: List[Dict]) -> List[str]:
+    def generate_variants(self, input_path: str, variants_config: List[Dict], max_workers: Optional[int] = None) -> List[VariantResult]:
         """
         Generate multiple variants of a video for A/B testing.
-        
+
         Args:
             input_path: Path to source video
             variants_config: List of dicts, e.g.
@@ -22,26 +35,87 @@ class ABVariantService:
                     {"name": "square_blur", "ratio": "1:1", "strategy": "blur_bg"},
                     {"name": "story_pad", "ratio": "9:16", "strategy": "pad"}
                 ]
+            max_workers: Number of concurrent ffmpeg processes (defaults to the service setting).
+                Variants are spread across workers; each worker renders its share from one decode,
+                and every output gets an even slice of the CPU cores as its libx264 thread budget.
         Returns:
-            List of generated file paths
+            One VariantResult per config entry, in the same order
         """
-        results = []
         base_name = os.path.splitext(os.path.basename(input_path))[0]
-        
+
+        placements = []
         for config in variants_config:
             variant_name = f"{base_name}_{config['name']}.mp4"
-            output_path = os.path.join(self.output_dir, variant_name)
-            
+            placements.append({
+                "name": config['name'],
+                "ratio": config['ratio'],
+                "strategy": config.get('strategy', 'blur_bg'),
+                "output_path": os.path.join(self.output_dir, variant_name)
+            })
             logger.info(f"Generating variant: {variant_name} with {config}")
+
+        if not placements:
+            return []
+
+        workers = max(1, min(max_workers or self.max_workers, len(placements)))
+        # Round-robin so heavy and light strategies are mixed within each job
+        groups = [placements[i::workers] for i in range(workers)]
+
+        # Every output of a group runs its own encoder, so split the cores per output
+        cpu_count = os.cpu_count() or 1
+        budgets = [max(1, cpu_count // workers // len(group)) for group in groups]
+
+        if workers == 1:
+            results = self._render_group(input_path, groups[0], threads=budgets[0])
+        else:
+            # Each job is an ffmpeg subprocess, so threads are enough to drive the pool
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(self._render_group, input_path, group, threads)
+                           for group, threads in zip(groups, budgets)]
+                results = [r for f in futures for r in f.result()]
+
+        by_path = {r.output_path: r for r in results}
+        return [by_path[p['output_path']] for p in placements]
+
+    def _render_group(self, input_path: str, placements: List[Dict], threads: Optional[int]) -> List[VariantResult]:
+        """Render a group of variants in one pass, isolating failures per variant if that fails"""
+        started = time.monotonic()
+        try:
+            # All variants in the group share one decode of the source
+            self.vp.render_placements(input_path, placements, threads=threads)
+            elapsed = time.monotonic() - started
+            return [self._result(p, "success", elapsed_sec=elapsed) for p in placements]
+        except Exception as e:
+            if len(placements) == 1:
+                logger.error(f"Failed to generate variant {placements[0]['output_path']}: {e}")
+                return [self._result(placements[0], "failed", error=str(e), elapsed_sec=time.monotonic() - started)]
+            logger.warning(f"Single-pass render failed for {len(placements)} variants, falling back to per-variant: {e}")
+
+        results = []
+        for placement in placements:
+            started = time.monotonic()
             try:
                 self.vp.convert_to_format(
                     input_path=input_path,
-                    output_path=output_path,
-                    target_aspect_ratio=config['ratio'],
-                    strategy=config.get('strategy', 'blur_bg')
+                    output_path=placement['output_path'],
+                    target_aspect_ratio=placement['ratio'],
+                    strategy=placement['strategy'],
+                    threads=threads
                 )
-                results.append(output_path)
+                results.append(self._result(placement, "success", elapsed_sec=time.monotonic() - started))
             except Exception as e:
-                logger.error(f"Failed to generate variant {variant_name}: {e}")
-                
+                logger.error(f"Failed to generate variant {placement['output_path']}: {e}")
+                results.append(self._result(placement, "failed", error=str(e), elapsed_sec=time.monotonic() - started))
+
         return results
+
+    def _result(self, placement: Dict, status: str, error: Optional[str] = None, elapsed_sec: float = 0.0) -> VariantResult:
+        return VariantResult(
+            name=placement['name'],
+            ratio=placement['ratio'],
+            strategy=placement['strategy'],
+            output_path=placement['output_path'],
+            status=status,
+            error=error,
+            elapsed_sec=round(elapsed_sec, 3)
+        )
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import time
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# USD per 1K tokens (input, output); unknown models count as free
+MODEL_PRICING = {
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4-vision-preview": (0.01, 0.03),
+    "gpt-4.1": (0.002, 0.008),
+    "gpt-4.1-mini": (0.0004, 0.0016),
+}
+
+AI_CACHE_TTL_SECONDS = 7 * 24 * 3600
+AI_CACHE_PREFIX = "reelforge:ai:"
+
+
+def estimate_cost(model: str, usage) -> float:
+    """Dollar cost of a completion from its usage block"""
+    if usage is None:
+        return 0.0
+    input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    return prompt_tokens / 1000 * input_price + completion_tokens / 1000 * output_price
+
+
+class MemoryBackend:
+    """In-process stand-in for Redis (local runs, or when Redis is unreachable)."""
+
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at < time.time():
+            del self._values[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._values[key] = (value, time.time() + ttl)
+
+    async def incr_stats(self, model: str, field: str, amount: float) -> None:
+        stats = self._stats.setdefault(model, {})
+        stats[field] = stats.get(field, 0) + amount
+
+    async def all_stats(self) -> Dict[str, Dict[str, float]]:
+        return {model: dict(stats) for model, stats in self._stats.items()}
+
+
+class RedisBackend:
+    """Redis store shared by the API and all workers."""
+
+    def __init__(self, url: str, prefix: str = AI_CACHE_PREFIX):
+        self.url = url
+        self.prefix = prefix
+        self._clients: Dict[int, tuple] = {}
+
+    def _client(self):
+        # redis.asyncio connections are bound to the loop that created them
+        import redis.asyncio as redis_async
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(id(loop))
+        if entry is None or entry[0] is not loop:
+            self._clients = {k: v for k, v in self._clients.items() if not v[0].is_closed()}
+            entry = (loop, redis_async.Redis.from_url(self.url, decode_responses=True))
+            self._clients[id(loop)] = entry
+        return entry[1]
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client().get(self.prefix + key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self._client().set(self.prefix + key, value, ex=ttl)
+
+    async def incr_stats(self, model: str, field: str, amount: float) -> None:
+        client = self._client()
+        await client.sadd(self.prefix + "models", model)
+        await client.hincrbyfloat(self.prefix + f"stats:{model}", field, amount)
+
+    async def all_stats(self) -> Dict[str, Dict[str, float]]:
+        client = self._client()
+        result = {}
+        for model in await client.smembers(self.prefix + "models"):
+            raw = await client.hgetall(self.prefix + f"stats:{model}")
+            result[model] = {k: float(v) for k, v in raw.items()}
+        return result
+
+
+class AIResponseCache:
+    """
+    Cache for LLM/VL responses keyed by model, prompts and image content.
+    Cache failures are logged and treated as misses, they never fail a request.
+    """
+
+    def __init__(self, backend=None, ttl: int = AI_CACHE_TTL_SECONDS):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+
+    def make_key(self, model: str, prompt: str, system_prompt: Optional[str] = None, images: Optional[List] = None) -> str:
+        image_hashes = [
+            hashlib.sha256(img if isinstance(img, bytes) else str(img).encode("utf-8")).hexdigest()
+            for img in (images or [])
+        ]
+        payload = json.dumps({
+            "model": model,
+            "system_prompt": system_prompt,
+            "prompt": prompt,
+            "images": image_hashes
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, model: str, key: str) -> Optional[str]:
+        """Cached content, counting the hit (and the dollars it saved) or miss for the model"""
+        try:
+            raw = await self.backend.get(key)
+            if raw is None:
+                await self.backend.incr_stats(model, "misses", 1)
+                return None
+            entry = json.loads(raw)
+            await self.backend.incr_stats(model, "hits", 1)
+            await self.backend.incr_stats(model, "saved_usd", entry.get("cost_usd", 0.0))
+            return entry["content"]
+        except Exception as e:
+            logger.warning(f"AI cache read failed: {e}")
+            return None
+
+    async def set(self, key: str, content: str, cost_usd: float) -> None:
+        try:
+            await self.backend.set(key, json.dumps({"content": content, "cost_usd": cost_usd}), self.ttl)
+        except Exception as e:
+            logger.warning(f"AI cache write failed: {e}")
+
+    async def stats(self) -> Dict[str, Dict]:
+        """Per-model hits, misses, hit ratio and dollars saved"""
+        result = {}
+        for model, raw in (await self.backend.all_stats()).items():
+            hits = int(raw.get("hits", 0))
+            misses = int(raw.get("misses", 0))
+            result[model] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "saved_usd": round(raw.get("saved_usd", 0.0), 4)
+            }
+        return result
+
+
+_default_cache: Optional[AIResponseCache] = None
+
+
+def get_response_cache() -> AIResponseCache:
+    """Process-wide cache, on Redis when REDIS_URL is configured"""
+    global _default_cache
+    if _default_cache is None:
+        from backend.core.config import settings
+        backend = RedisBackend(settings.REDIS_URL) if settings.REDIS_URL else MemoryBackend()
+        _default_cache = AIResponseCache(backend)
+    return _default_cache
@@ -1,31 +1,209 @@
-from openai import OpenAI
-from typing import List, Dict, Optional, Union
+from openai import AsyncOpenAI
+import openai
+import httpx
+from typing import List, Dict, Optional, Union, Tuple, Callable
+import asyncio
+import base64
+import random
+import time
 import logging
 from pydantic import BaseModel
+from backend.services.ai_cache import AIResponseCache, get_response_cache, estimate_cost
+from backend.services.frame_packer import FramePacker, tile_size_for
 
 logger = logging.getLogger(__name__)
 
+# Rough pre-charge against the TPM budget before the real usage is known
+CHARS_PER_TOKEN = 4
+IMAGE_TOKEN_ESTIMATE = 800
+COMPLETION_TOKEN_ESTIMATE = 500
+
 class AIProviderConfig(BaseModel):
     provider_name: str
     api_base: str
     api_key: str
     model_name: str
-    
-class AIService:
-    def __init__(self, config: AIProviderConfig):
-        self.config = config
-        self.client = OpenAI(
+    max_concurrency: int = 8
+    rpm_limit: Optional[int] = None  # requests per minute, None = unlimited
+    tpm_limit: Optional[int] = None  # tokens per minute, None = unlimited
+    max_retries: int = 5
+    timeout: float = 120.0
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.tokens = float(rate_per_minute)
+        self.refill_per_sec = rate_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_sec)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.refill_per_sec)
+
+class ProviderPool:
+    """
+    Per-provider shared state: one HTTP connection pool, a concurrency cap and
+    the RPM/TPM buckets. asyncio primitives are bound to an event loop, so
+    there is one pool per (provider, loop).
+    """
+
+    def __init__(self, config: AIProviderConfig, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.limits = _pool_limits(config)
+        self.http_client = httpx.AsyncClient(
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_concurrency * 2,
+                max_keepalive_connections=config.max_concurrency
+            )
+        )
+        # Retries are handled by AIService so they share the rate limits
+        self.client = AsyncOpenAI(
             base_url=config.api_base,
-            api_key=config.api_key
+            api_key=config.api_key,
+            max_retries=0,
+            http_client=self.http_client
         )
+        self.semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.rpm = TokenBucket(config.rpm_limit) if config.rpm_limit else None
+        self.tpm = TokenBucket(config.tpm_limit) if config.tpm_limit else None
+
+    async def acquire_rate(self, estimated_tokens: int) -> None:
+        if self.rpm:
+            await self.rpm.acquire(1)
+        if self.tpm:
+            await self.tpm.acquire(estimated_tokens)
+
+def _pool_limits(config: AIProviderConfig) -> Tuple:
+    return (config.max_concurrency, config.rpm_limit, config.tpm_limit, config.timeout)
+
+_pools: Dict[Tuple, ProviderPool] = {}
+
+def get_provider_pool(config: AIProviderConfig) -> ProviderPool:
+    """Return the shared pool for this provider on the running event loop."""
+    loop = asyncio.get_running_loop()
+    # Drop pools whose loop is gone (e.g. finished asyncio.run calls)
+    for key in [k for k, p in _pools.items() if p.loop.is_closed()]:
+        del _pools[key]
+
+    key = (config.api_base, config.api_key, id(loop))
+    pool = _pools.get(key)
+    if pool is not None and pool.limits != _pool_limits(config):
+        # Limits changed in settings; requests already in flight finish on the old pool
+        logger.info(f"Provider limits for {config.api_base} changed, rebuilding its pool")
+        pool = None
+    if pool is None or pool.loop is not loop:
+        pool = ProviderPool(config, loop)
+        _pools[key] = pool
+    return pool
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def _backoff_delay(error: Exception, attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff, honouring Retry-After when the server sends it"""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after:
+                return min(cap, float(retry_after)) + random.uniform(0, base)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class AIService:
+    def __init__(self, config: AIProviderConfig, cache: Optional[AIResponseCache] = None):
+        self.config = config
+        self._cache = cache
 
-    def analyze_image(self, image_url: str, prompt: str) -> str:
+    @property
+    def cache(self) -> AIResponseCache:
+        if self._cache is None:
+            self._cache = get_response_cache()
+        return self._cache
+
+    async def _cached_completion(self, messages: List[Dict], estimated_tokens: int, cache_key: str, use_cache: bool,
+                                 accept: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Serve a completion from the response cache, or run it and store the result.
+        With use_cache=False the lookup is skipped but the fresh result still refreshes the cache.
+        `accept` lets the caller reject replies it can't use (e.g. unparseable JSON):
+        a rejected cached reply counts as a miss, a rejected fresh one is returned but not stored.
+        """
+        if use_cache:
+            cached = await self._cache_lookup(cache_key, accept)
+            if cached is not None:
+                return cached
+        return await self._complete_and_store(messages, estimated_tokens, cache_key, accept)
+
+    async def _cache_lookup(self, cache_key: str, accept: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """Cached reply for `cache_key`, or None on a miss or when `accept` rejects it"""
+        cached = await self.cache.get(self.config.model_name, cache_key)
+        if cached is not None and (accept is None or accept(cached)):
+            return cached
+        return None
+
+    async def _complete_and_store(self, messages: List[Dict], estimated_tokens: int, cache_key: str,
+                                  accept: Optional[Callable[[str], bool]] = None) -> str:
+        model = self.config.model_name
+        response = await self._chat(messages, estimated_tokens)
+        content = response.choices[0].message.content
+        if content is None:
+            # Refusals and tool-call-only replies carry no text; don't pin that in the cache
+            logger.warning(f"AI response from {model} had no content")
+            return ""
+        if accept is not None and not accept(content):
+            # Caching it would hand the same bad reply to every retry until the TTL expires
+            logger.warning(f"AI response from {model} rejected by caller, not caching it")
+            return content
+        await self.cache.set(cache_key, content, estimate_cost(model, getattr(response, "usage", None)))
+        return content
+
+    async def _chat(self, messages: List[Dict], estimated_tokens: int):
+        """Run a chat completion under the provider's concurrency cap, rate limits and retry policy"""
+        pool = get_provider_pool(self.config)
+        attempt = 0
+        while True:
+            await pool.acquire_rate(estimated_tokens)
+            try:
+                async with pool.semaphore:
+                    return await pool.client.chat.completions.create(
+                        model=self.config.model_name,
+                        messages=messages
+                    )
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= self.config.max_retries:
+                    raise e
+                delay = _backoff_delay(e, attempt)
+                attempt += 1
+                logger.warning(f"AI request failed ({e.__class__.__name__}), retry {attempt}/{self.config.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _estimate_tokens(self, texts: List[str], image_count: int = 0) -> int:
+        return sum(len(t) for t in texts) // CHARS_PER_TOKEN + image_count * IMAGE_TOKEN_ESTIMATE + COMPLETION_TOKEN_ESTIMATE
+
+    async def analyze_image(self, image_url: str, prompt: str, use_cache: bool = True,
+                            accept: Optional[Callable[[str], bool]] = None) -> str:
         """
         Analyze an image (VL model)
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.model_name,
+            return await self._cached_completion(
                 messages=[
                     {
                         "role": "user",
@@ -34,26 +212,89 @@ class AIService:
                             {"type": "image_url", "image_url": {"url": image_url}}
                         ]
                     }
-                ]
+                ],
+                estimated_tokens=self._estimate_tokens([prompt], image_count=1),
+                cache_key=self.cache.make_key(self.config.model_name, prompt, images=[image_url]),
+                use_cache=use_cache,
+                accept=accept
             )
-            return response.choices[0].message.content
         except Exception as e:
             logger.error(f"AI Analysis failed: {e}")
             raise e
 
-    def generate_text(self, prompt: str, system_prompt: str = "You are a helpful assistant.") -> str:
+    async def analyze_images(self,
+                             frames: List[Union[bytes, str]],
+                             prompt: str,
+                             mode: str = "multi",
+                             use_cache: bool = True,
+                             accept: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Analyze several frames in a single VL request.
+        
+        Args:
+            frames: JPEG bytes (resized to the provider's tile size and inlined as
+                base64) or image URLs (sent as-is)
+            mode: "multi" sends one image part per frame; "contact_sheet" tiles the
+                JPEG frames into a single image to cut per-image token overhead
+            accept: Reply check; replies failing it are never cached (see _cached_completion)
+        """
+        if mode not in ("multi", "contact_sheet"):
+            raise ValueError(f"Unknown image packing mode: {mode}")
+        try:
+            # Keyed on the raw frames, so a hit skips the ffmpeg resize/tiling below
+            cache_key = self.cache.make_key(self.config.model_name, f"{mode}:{prompt}", images=frames)
+            if use_cache:
+                cached = await self._cache_lookup(cache_key, accept)
+                if cached is not None:
+                    return cached
+
+            tile_size = tile_size_for(self.config.provider_name)
+            packer = FramePacker()
+            jpegs = [f for f in frames if isinstance(f, bytes)]
+
+            if mode == "contact_sheet" and jpegs and len(jpegs) == len(frames):
+                sheet = await asyncio.to_thread(packer.contact_sheet, jpegs, tile_size)
+                image_urls = [self._data_url(sheet)]
+                prompt = (
+                    f"The image is a contact sheet of {len(frames)} frames in chronological order, "
+                    f"read left to right, top to bottom.\n{prompt}"
+                )
+            else:
+                resized = iter(await asyncio.to_thread(packer.resize, jpegs, tile_size) if jpegs else [])
+                image_urls = [self._data_url(next(resized)) if isinstance(f, bytes) else f for f in frames]
+
+            content = [{"type": "text", "text": prompt}]
+            content += [{"type": "image_url", "image_url": {"url": url}} for url in image_urls]
+
+            return await self._complete_and_store(
+                messages=[{"role": "user", "content": content}],
+                estimated_tokens=self._estimate_tokens([prompt], image_count=len(image_urls)),
+                cache_key=cache_key,
+                accept=accept
+            )
+        except Exception as e:
+            logger.error(f"AI Analysis failed: {e}")
+            raise e
+
+    def _data_url(self, jpeg: bytes) -> str:
+        return "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii")
+
+    async def generate_text(self, prompt: str, system_prompt: str = "You are a helpful assistant.", use_cache: bool = True,
+                            accept: Optional[Callable[[str], bool]] = None) -> str:
         """
         Generate text (LLM model)
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.model_name,
+            return await self._cached_completion(
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                estimated_tokens=self._estimate_tokens([system_prompt, prompt]),
+                cache_key=self.cache.make_key(self.config.model_name, prompt, system_prompt=system_prompt),
+                use_cache=use_cache,
+                accept=accept
             )
-            return response.choices[0].message.content
         except Exception as e:
              logger.error(f"AI Generation failed: {e}")
              raise e
@@ -0,0 +1,167 @@
+import os
+import time
+import fcntl
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# fsync after this many appends, or once this many seconds passed since the last one
+ARCHIVE_FSYNC_EVERY = 64
+ARCHIVE_FSYNC_INTERVAL = 1.0
+
+# Deleted ids stay in the file until compaction; compact after this many deletes or this long
+ARCHIVE_COMPACT_AFTER_DELETES = 100
+ARCHIVE_COMPACT_INTERVAL = 300.0
+
+
+class ArchiveFileWriter:
+    """
+    Incremental maintenance of yt-dlp's archive.txt ("platform video_id" per line).
+
+    Adds are O(1) appends with batched fsync. Deletes are only counted; the file
+    is compacted (rewritten from the source of truth) once enough deletes
+    accumulate. Full rewrites go to a temp file and are renamed into place, so
+    readers such as yt-dlp never see a partial file.
+
+    Appends and rewrites also hold an exclusive flock on a sidecar "<path>.lock"
+    file, so an append from another worker process can't land in the old file
+    while a compaction is replacing it.
+    """
+
+    def __init__(self,
+                 path: str,
+                 fsync_every: int = ARCHIVE_FSYNC_EVERY,
+                 fsync_interval: float = ARCHIVE_FSYNC_INTERVAL,
+                 compact_after_deletes: int = ARCHIVE_COMPACT_AFTER_DELETES,
+                 compact_interval: float = ARCHIVE_COMPACT_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_after_deletes = compact_after_deletes
+        self.compact_interval = compact_interval
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+        self._handle = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._pending_deletes = 0
+        self._first_delete_at: Optional[float] = None
+
+    def append(self, platform: str, video_id: str) -> None:
+        with self._lock, self._file_lock():
+            handle = self._open_for_append()
+            handle.write(f"{platform} {video_id}\n")
+            handle.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._fsync()
+
+    def sync(self) -> None:
+        """Force pending appends to disk"""
+        with self._lock:
+            if self._handle is not None:
+                self._fsync()
+
+    def mark_deleted(self) -> None:
+        """Record that an entry was removed from the source of truth"""
+        with self._lock:
+            self._pending_deletes += 1
+            if self._first_delete_at is None:
+                self._first_delete_at = time.monotonic()
+
+    def needs_compaction(self) -> bool:
+        with self._lock:
+            if not self._pending_deletes:
+                return False
+            return (self._pending_deletes >= self.compact_after_deletes
+                    or time.monotonic() - self._first_delete_at >= self.compact_interval)
+
+    def rewrite(self, entries: Iterable[Tuple[str, str]]) -> int:
+        """
+        Atomically replace the file with `entries` ((platform, video_id) pairs). Returns the line count.
+        Pass a lazy iterable (e.g. a streamed query) so the source is read under the file lock.
+        """
+        with self._lock, self._file_lock():
+            self._close()
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            count = 0
+            try:
+                with open(tmp_path, "w", buffering=1024 * 1024) as f:
+                    for platform, video_id in entries:
+                        f.write(f"{platform} {video_id}\n")
+                        count += 1
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self._fsync_dir()
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._pending_deletes = 0
+            self._first_delete_at = None
+            return count
+
+    def remove(self) -> None:
+        with self._lock, self._file_lock():
+            self._close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._pending_deletes = 0
+            self._first_delete_at = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    @contextmanager
+    def _file_lock(self):
+        """Cross-process exclusive lock; callers already hold self._lock"""
+        if self._lock_fd is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _open_for_append(self):
+        # Another process may have renamed a compacted file into place; follow it
+        if self._handle is not None:
+            try:
+                if os.stat(self.path).st_ino != os.fstat(self._handle.fileno()).st_ino:
+                    self._close()
+            except FileNotFoundError:
+                self._close()
+        if self._handle is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._handle = open(self.path, "a")
+        return self._handle
+
+    def _fsync(self) -> None:
+        os.fsync(self._handle.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _fsync_dir(self) -> None:
+        fd = os.open(os.path.dirname(self.path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _close(self) -> None:
+        if self._handle is not None:
+            try:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+            finally:
+                self._handle.close()
+                self._handle = None
+                self._unsynced = 0
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from backend.db.session import SessionLocal
+from backend.models.download_archive import DownloadArchive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FILTER_MIN_CAPACITY = 100000
+ARCHIVE_FILTER_ERROR_RATE = 0.001
+# Other processes (download workers) add ids too; long-lived processes reload after this long
+ARCHIVE_FILTER_MAX_AGE = 600.0
+
+# Video id patterns for URLs we can resolve without asking yt-dlp
+_VIDEO_ID_PATTERNS = [
+    re.compile(r"tiktok\.com/@[^/]+/(?:video|photo)/(\d+)"),
+    re.compile(r"youtube\.com/shorts/([\w-]{11})"),
+    re.compile(r"youtube\.com/watch\?(?:.*&)?v=([\w-]{11})"),
+    re.compile(r"youtu\.be/([\w-]{11})"),
+]
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """Video id from a single-video URL, or None for channels/playlists/unknown sites"""
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float = ARCHIVE_FILTER_ERROR_RATE):
+        self.capacity = capacity
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class ArchiveMembership:
+    """
+    Fast "already downloaded?" checks for video ids.
+
+    A Bloom filter built from download_archive answers most lookups in memory;
+    only ids the filter reports as present are confirmed against the database,
+    which also covers false positives and ids deleted since the last rebuild.
+    """
+
+    def __init__(self,
+                 min_capacity: int = ARCHIVE_FILTER_MIN_CAPACITY,
+                 error_rate: float = ARCHIVE_FILTER_ERROR_RATE,
+                 max_age: float = ARCHIVE_FILTER_MAX_AGE):
+        self.min_capacity = min_capacity
+        self.error_rate = error_rate
+        self.max_age = max_age
+        self._filter: Optional[BloomFilter] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def rebuild(self) -> int:
+        """Reload the filter from the database. Returns the number of ids loaded."""
+        db = SessionLocal()
+        try:
+            total = db.query(DownloadArchive.id).count()
+            bloom = BloomFilter(max(self.min_capacity, total * 2), self.error_rate)
+            for (video_id,) in db.query(DownloadArchive.video_id).yield_per(10000):
+                bloom.add(video_id)
+        finally:
+            db.close()
+        with self._lock:
+            self._filter = bloom
+            self._loaded_at = time.monotonic()
+        logger.info(f"Archive membership filter loaded with {bloom.count} ids")
+        return bloom.count
+
+    def invalidate(self) -> None:
+        """Drop the filter; it is rebuilt on next use (e.g. after a bulk import)"""
+        with self._lock:
+            self._filter = None
+
+    def reset(self) -> None:
+        """Empty filter, for when the archive was cleared"""
+        with self._lock:
+            self._filter = BloomFilter(self.min_capacity, self.error_rate)
+            self._loaded_at = time.monotonic()
+
+    def add(self, video_id: str) -> None:
+        bloom = self._ensure_loaded()
+        with self._lock:
+            bloom.add(video_id)
+        if bloom.count > bloom.capacity:
+            # Past capacity the false-positive rate climbs; resize from the DB
+            self.rebuild()
+
+    def filter_new(self, video_ids: Iterable[str]) -> List[str]:
+        """Return the ids (in order) that are not in the archive"""
+        ids = list(video_ids)
+        bloom = self._ensure_loaded()
+        candidates = list({vid for vid in ids if vid in bloom})
+        known = set()
+        if candidates:
+            db = SessionLocal()
+            try:
+                for i in range(0, len(candidates), 1000):
+                    rows = (
+                        db.query(DownloadArchive.video_id)
+                        .filter(DownloadArchive.video_id.in_(candidates[i:i + 1000]))
+                        .all()
+                    )
+                    known.update(video_id for (video_id,) in rows)
+            finally:
+                db.close()
+        return [vid for vid in ids if vid not in known]
+
+    def is_known(self, video_id: str) -> bool:
+        return not self.filter_new([video_id])
+
+    def _ensure_loaded(self) -> BloomFilter:
+        bloom = self._filter
+        if bloom is None or time.monotonic() - self._loaded_at > self.max_age:
+            self.rebuild()
+            bloom = self._filter
+        return bloom
+
+
+archive_membership = ArchiveMembership()
@@ -1,24 +1,55 @@
+import base64
+import json
 import logging
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from backend.db.session import SessionLocal
 from backend.models.download_archive import DownloadArchive
+from backend.services.archive_file import ArchiveFileWriter
+from backend.services.archive_filter import archive_membership
 
 logger = logging.getLogger(__name__)
 
 # Path to the archive.txt file that yt-dlp uses
 ARCHIVE_FILE_PATH = "/app/data/archive.txt"
 
+# Lines per bulk insert when importing archive.txt
+ARCHIVE_IMPORT_CHUNK_SIZE = 5000
+
+# Below this many rows (per the planner estimate) an exact count is cheap enough
+ARCHIVE_EXACT_COUNT_BELOW = 100000
+# How long a search's match count is reused while paging
+ARCHIVE_COUNT_CACHE_TTL = 30.0
+
+archive_file = ArchiveFileWriter(ARCHIVE_FILE_PATH)
+
+# search term -> (count, monotonic time computed)
+_search_count_cache: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+# Listings run on FastAPI's threadpool
+_search_count_lock = threading.Lock()
+
 
 class ArchiveService:
     """Service for managing download archive (tracks downloaded videos)."""
 
     @staticmethod
-    def get_entries(skip: int = 0, limit: int = 100, search: Optional[str] = None) -> dict:
-        """Get archive entries from database with pagination and search."""
+    def get_entries(skip: int = 0, limit: int = 100, search: Optional[str] = None, cursor: Optional[str] = None) -> dict:
+        """
+        Get archive entries from database, newest first, with search.
+
+        Pass the previous page's `next_cursor` as `cursor` for keyset pagination
+        on (downloaded_at, id); `skip` (OFFSET) is still honoured when no
+        cursor is given. Substring search is served by the pg_trgm GIN indexes.
+        """
         db = SessionLocal()
         try:
             query = db.query(DownloadArchive)
@@ -31,8 +62,21 @@ class ArchiveService:
                     (DownloadArchive.uploader.ilike(search_pattern))
                 )
             
-            total = query.count()
-            entries = query.order_by(DownloadArchive.downloaded_at.desc()).offset(skip).limit(limit).all()
+            total, estimated = ArchiveService._count(db, query, search)
+            
+            query = query.order_by(DownloadArchive.downloaded_at.desc(), DownloadArchive.id.desc())
+            if cursor:
+                downloaded_at, entry_id = ArchiveService._decode_cursor(cursor)
+                query = query.filter(
+                    tuple_(DownloadArchive.downloaded_at, DownloadArchive.id) < tuple_(downloaded_at, entry_id)
+                )
+            elif skip:
+                query = query.offset(skip)
+            entries = query.limit(limit).all()
+            
+            next_cursor = None
+            if len(entries) == limit and entries[-1].downloaded_at:
+                next_cursor = ArchiveService._encode_cursor(entries[-1].downloaded_at, entries[-1].id)
             
             return {
                 "entries": [
@@ -47,15 +91,66 @@ class ArchiveService:
                     for e in entries
                 ],
                 "total": total,
+                "total_estimated": estimated,
                 "skip": skip,
-                "limit": limit
+                "limit": limit,
+                "next_cursor": next_cursor
             }
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get archive entries: {e}")
-            return {"entries": [], "total": 0, "skip": skip, "limit": limit}
+            return {"entries": [], "total": 0, "skip": skip, "limit": limit, "next_cursor": None}
         finally:
             db.close()
 
+    @staticmethod
+    def _encode_cursor(downloaded_at: datetime, entry_id: int) -> str:
+        raw = json.dumps([downloaded_at.isoformat(), entry_id])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            downloaded_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(downloaded_at), int(entry_id)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid archive cursor: {cursor}") from e
+
+    @staticmethod
+    def _count(db, query, search: Optional[str]) -> Tuple[int, bool]:
+        """
+        Total for a listing, as (count, is_estimate). Unfiltered totals come
+        from the planner's row estimate once the table is large; filtered
+        counts are cached briefly so paging through results counts once.
+        """
+        if not search:
+            estimate = ArchiveService._estimated_rows(db)
+            if estimate >= ARCHIVE_EXACT_COUNT_BELOW:
+                return estimate, True
+            return query.count(), False
+        
+        now = time.monotonic()
+        with _search_count_lock:
+            cached = _search_count_cache.get(search)
+        if cached and now - cached[1] < ARCHIVE_COUNT_CACHE_TTL:
+            return cached[0], False
+        total = query.count()
+        with _search_count_lock:
+            _search_count_cache[search] = (total, now)
+            _search_count_cache.move_to_end(search)
+            while len(_search_count_cache) > 256:
+                _search_count_cache.popitem(last=False)
+        return total, False
+
+    @staticmethod
+    def _estimated_rows(db) -> int:
+        """Row estimate maintained by ANALYSE/autovacuum (-1 if never analysed)"""
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'download_archive'::regclass")
+        ).scalar()
+        return int(estimate or 0)
+
     @staticmethod
     def add_entry(video_id: str, platform: str = "unknown", title: Optional[str] = None, uploader: Optional[str] = None) -> dict:
         """Add a new entry to the archive."""
@@ -76,8 +171,17 @@ class ArchiveService:
             db.commit()
             db.refresh(entry)
             
-            # Sync to file
-            ArchiveService._sync_to_file()
+            try:
+                archive_membership.add(video_id)
+            except Exception as e:
+                logger.error(f"Failed to update archive membership filter: {e}")
+            
+            # Append to file (O(1)); deletes are folded in by periodic compaction
+            try:
+                archive_file.append(platform, video_id)
+            except Exception as e:
+                logger.error(f"Failed to append to archive file: {e}")
+            ArchiveService._compact_if_needed()
             
             return {"status": "added", "id": entry.id}
         except Exception as e:
@@ -99,8 +203,9 @@ class ArchiveService:
             db.delete(entry)
             db.commit()
             
-            # Sync to file
-            ArchiveService._sync_to_file()
+            # The line stays in the file until the next compaction
+            archive_file.mark_deleted()
+            ArchiveService._compact_if_needed()
             
             return {"status": "deleted"}
         except Exception as e:
@@ -119,8 +224,10 @@ class ArchiveService:
             db.commit()
             
             # Clear file
-            if os.path.exists(ARCHIVE_FILE_PATH):
-                os.remove(ARCHIVE_FILE_PATH)
+            archive_file.remove()
+            archive_membership.reset()
+            with _search_count_lock:
+                _search_count_cache.clear()
             
             return {"status": "cleared", "count": count}
         except Exception as e:
@@ -131,52 +238,83 @@ class ArchiveService:
             db.close()
 
     @staticmethod
-    def sync_from_file() -> dict:
-        """Sync entries from the archive.txt file to database."""
+    def sync_from_file(chunk_size: int = ARCHIVE_IMPORT_CHUNK_SIZE) -> dict:
+        """
+        Sync entries from the archive.txt file to database.
+        Streams the file and bulk-inserts it chunk by chunk with
+        INSERT ... ON CONFLICT DO NOTHING, so memory stays bounded and
+        existing ids cost no extra round trips.
+        """
         if not os.path.exists(ARCHIVE_FILE_PATH):
             return {"status": "file_not_found", "added": 0}
         
         db = SessionLocal()
-        added_count = 0
+        inserted = 0
+        skipped = 0
         try:
+            batch = {}
             with open(ARCHIVE_FILE_PATH, 'r') as f:
-                lines = f.readlines()
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # yt-dlp archive format: "platform video_id"
-                parts = line.split(' ', 1)
-                if len(parts) == 2:
-                    platform, video_id = parts
-                else:
-                    platform, video_id = "unknown", parts[0]
-                
-                # Check if exists
-                existing = db.query(DownloadArchive).filter(DownloadArchive.video_id == video_id).first()
-                if not existing:
-                    entry = DownloadArchive(video_id=video_id, platform=platform)
-                    db.add(entry)
-                    added_count += 1
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    
+                    # yt-dlp archive format: "platform video_id"
+                    parts = line.split(' ', 1)
+                    if len(parts) == 2:
+                        platform, video_id = parts
+                    else:
+                        platform, video_id = "unknown", parts[0]
+                    
+                    if video_id in batch:
+                        skipped += 1
+                        continue
+                    batch[video_id] = platform
+                    
+                    if len(batch) >= chunk_size:
+                        added = ArchiveService._insert_batch(db, batch)
+                        inserted += added
+                        skipped += len(batch) - added
+                        batch = {}
             
-            db.commit()
-            return {"status": "synced", "added": added_count}
+            if batch:
+                added = ArchiveService._insert_batch(db, batch)
+                inserted += added
+                skipped += len(batch) - added
+            
+            if inserted:
+                archive_membership.invalidate()
+            logger.info(f"Synced archive file: {inserted} inserted, {skipped} skipped")
+            return {"status": "synced", "added": inserted, "skipped": skipped}
         except Exception as e:
             logger.error(f"Failed to sync from file: {e}")
             db.rollback()
-            return {"status": "error", "error": str(e)}
+            return {"status": "error", "error": str(e), "added": inserted, "skipped": skipped}
         finally:
             db.close()
 
+    @staticmethod
+    def _insert_batch(db, batch: Dict[str, str]) -> int:
+        """Insert a chunk of {video_id: platform}, ignoring ids already present. Returns rows inserted."""
+        stmt = pg_insert(DownloadArchive).values([
+            {"video_id": video_id, "platform": platform} for video_id, platform in batch.items()
+        ]).on_conflict_do_nothing(index_elements=[DownloadArchive.video_id])
+        result = db.execute(stmt)
+        # Commit per chunk: the import is idempotent, so a failure keeps the progress made
+        db.commit()
+        return result.rowcount
+
     @staticmethod
     def get_status() -> dict:
         """Get archive status."""
         db = SessionLocal()
         try:
-            total = db.query(DownloadArchive).count()
-            latest = db.query(DownloadArchive).order_by(DownloadArchive.downloaded_at.desc()).first()
+            total, _ = ArchiveService._count(db, db.query(DownloadArchive), None)
+            latest = (
+                db.query(DownloadArchive)
+                .order_by(DownloadArchive.downloaded_at.desc(), DownloadArchive.id.desc())
+                .first()
+            )
             file_exists = os.path.exists(ARCHIVE_FILE_PATH)
             
             return {
@@ -190,17 +328,24 @@ class ArchiveService:
         finally:
             db.close()
 
+    @staticmethod
+    def _compact_if_needed() -> None:
+        """Rewrite the file once enough deletes have piled up."""
+        if archive_file.needs_compaction():
+            ArchiveService._sync_to_file()
+
     @staticmethod
     def _sync_to_file() -> None:
-        """Sync database entries to archive.txt file."""
+        """Rewrite archive.txt from the database (atomic rename, streamed in batches)."""
         db = SessionLocal()
         try:
-            entries = db.query(DownloadArchive).all()
-            os.makedirs(os.path.dirname(ARCHIVE_FILE_PATH), exist_ok=True)
-            with open(ARCHIVE_FILE_PATH, 'w') as f:
-                for entry in entries:
-                    f.write(f"{entry.platform} {entry.video_id}\n")
-            logger.info(f"Synced {len(entries)} entries to {ARCHIVE_FILE_PATH}")
+            rows = (
+                db.query(DownloadArchive.platform, DownloadArchive.video_id)
+                .order_by(DownloadArchive.id)
+                .yield_per(10000)
+            )
+            count = archive_file.rewrite((platform, video_id) for platform, video_id in rows)
+            logger.info(f"Synced {count} entries to {ARCHIVE_FILE_PATH}")
         except Exception as e:
             logger.error(f"Failed to sync to file: {e}")
         finally:
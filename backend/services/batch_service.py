@@ -1,38 +1,80 @@
+import hashlib
 import logging
 import os
-from datetime import datetime
-from typing import Optional, List
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy import func, or_, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from backend.db.session import SessionLocal
-from backend.models.batch_links import BatchLinks
+from backend.models.batch_item import BatchItem
+from backend.services.archive_filter import archive_membership, extract_video_id
 
 logger = logging.getLogger(__name__)
 
 # Path to the links.txt file that yt-dlp will use
 LINKS_FILE_PATH = "/app/data/links.txt"
 
+# Rows per INSERT when importing links
+BATCH_IMPORT_CHUNK_SIZE = 1000
+# Failed links are retried by later runs until they have used this many attempts
+BATCH_MAX_ATTEMPTS = 3
+# Links queued/running this long (e.g. the flow run crashed) can be picked up again
+BATCH_STALE_AFTER = timedelta(hours=6)
+
+# Share/tracking query parameters that don't change which video a link points to
+TRACKING_PARAMS = {"is_from_webapp", "sender_device", "sender_web_id", "web_id", "lang", "_r", "_t", "si", "feature", "share_app_id"}
+
+PLATFORM_HOSTS = {
+    "tiktok.com": "tiktok",
+    "youtube.com": "youtube",
+    "youtu.be": "youtube",
+    "instagram.com": "instagram",
+    "douyin.com": "douyin",
+}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for de-duplication (host case, www., fragments, tracking params, trailing slash)"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k not in TRACKING_PARAMS and not k.startswith("utm_")]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def detect_platform(url: str) -> str:
+    host = urlsplit(url.strip()).netloc.lower()
+    for domain, platform in PLATFORM_HOSTS.items():
+        if host == domain or host.endswith("." + domain):
+            return platform
+    return "other"
+
 
 class BatchService:
-    """Service for managing batch download links."""
+    """Service for managing batch download links (one batch_items row per link)."""
 
     @staticmethod
     def get_content() -> dict:
-        """Get batch links content from database."""
+        """Get batch links as links.txt text (one URL per line)."""
         db = SessionLocal()
         try:
-            record = db.query(BatchLinks).filter(BatchLinks.id == 1).first()
-            if not record:
-                return {
-                    "content": "",
-                    "updated_at": None,
-                    "count": 0
-                }
-            
-            lines = [l for l in record.content.strip().split('\n') if l.strip() and not l.strip().startswith('#')]
+            urls = [url for (url,) in db.query(BatchItem.url).order_by(BatchItem.id).yield_per(5000)]
+            updated_at = db.query(func.max(BatchItem.updated_at)).scalar()
             return {
-                "content": record.content,
-                "updated_at": record.updated_at.isoformat() if record.updated_at else None,
-                "count": len(lines)
+                "content": "\n".join(urls),
+                "updated_at": updated_at.isoformat() if updated_at else None,
+                "count": len(urls)
             }
         except Exception as e:
             logger.error(f"Failed to get batch content: {e}")
@@ -42,29 +84,45 @@ class BatchService:
 
     @staticmethod
     def save_content(content: str) -> dict:
-        """Save batch links content to database and sync to file."""
+        """Replace the link list with `content`: new links are added, links no longer listed are removed."""
+        return BatchService.import_links(content, replace=True)
+
+    @staticmethod
+    def import_links(content: str, replace: bool = False) -> dict:
+        """
+        Import links.txt content. Only links not already stored (by normalized
+        URL) are inserted, so existing rows keep their status and attempts.
+        With replace=True, stored links missing from `content` are deleted
+        (unless a run currently holds them).
+        """
+        rows = {}
+        for url in BatchService.parse_links(content):
+            key = url_hash(url)
+            if key not in rows:
+                rows[key] = {"url": url, "url_hash": key, "platform": detect_platform(url), "status": "pending"}
+
         db = SessionLocal()
         try:
-            record = db.query(BatchLinks).filter(BatchLinks.id == 1).first()
-            if not record:
-                record = BatchLinks(id=1, content=content)
-                db.add(record)
-            else:
-                record.content = content
-                record.updated_at = datetime.utcnow()
-            
+            added = 0
+            values = list(rows.values())
+            for i in range(0, len(values), BATCH_IMPORT_CHUNK_SIZE):
+                stmt = pg_insert(BatchItem).values(values[i:i + BATCH_IMPORT_CHUNK_SIZE])
+                stmt = stmt.on_conflict_do_nothing(index_elements=[BatchItem.url_hash])
+                added += db.execute(stmt).rowcount
+
+            removed = 0
+            if replace:
+                stale_ids = [
+                    item_id for item_id, key in
+                    db.query(BatchItem.id, BatchItem.url_hash).filter(BatchItem.status.notin_(["queued", "running"]))
+                    if key not in rows
+                ]
+                for i in range(0, len(stale_ids), BATCH_IMPORT_CHUNK_SIZE):
+                    removed += db.query(BatchItem).filter(
+                        BatchItem.id.in_(stale_ids[i:i + BATCH_IMPORT_CHUNK_SIZE])
+                    ).delete(synchronize_session=False)
+
             db.commit()
-            db.refresh(record)
-            
-            # Sync to file for yt-dlp to use
-            BatchService._sync_to_file(content)
-            
-            lines = [l for l in content.strip().split('\n') if l.strip() and not l.strip().startswith('#')]
-            return {
-                "status": "saved",
-                "updated_at": record.updated_at.isoformat() if record.updated_at else None,
-                "count": len(lines)
-            }
         except Exception as e:
             logger.error(f"Failed to save batch content: {e}")
             db.rollback()
@@ -72,6 +130,18 @@ class BatchService:
         finally:
             db.close()
 
+        # Sync to file for yt-dlp to use
+        BatchService._sync_to_file()
+
+        status = BatchService.get_status()
+        return {
+            "status": "saved",
+            "added": added,
+            "removed": removed,
+            "updated_at": status["updated_at"],
+            "count": status["count"]
+        }
+
     @staticmethod
     def parse_links(content: str) -> List[str]:
         """Parse content and extract valid URLs."""
@@ -89,22 +159,162 @@ class BatchService:
 
     @staticmethod
     def get_status() -> dict:
-        """Get batch links status (count, last updated, file exists)."""
-        data = BatchService.get_content()
-        file_exists = os.path.exists(LINKS_FILE_PATH)
-        return {
-            "count": data["count"],
-            "updated_at": data["updated_at"],
-            "file_exists": file_exists
-        }
+        """Get batch links status (count per status, last updated, file exists)."""
+        db = SessionLocal()
+        try:
+            statuses = dict(
+                db.query(BatchItem.status, func.count(BatchItem.id)).group_by(BatchItem.status).all()
+            )
+            updated_at = db.query(func.max(BatchItem.updated_at)).scalar()
+            return {
+                "count": sum(statuses.values()),
+                "statuses": statuses,
+                "updated_at": updated_at.isoformat() if updated_at else None,
+                "file_exists": os.path.exists(LINKS_FILE_PATH)
+            }
+        except Exception as e:
+            logger.error(f"Failed to get batch status: {e}")
+            return {"count": 0, "statuses": {}, "updated_at": None, "file_exists": os.path.exists(LINKS_FILE_PATH)}
+        finally:
+            db.close()
+
+    @staticmethod
+    def start_batch() -> dict:
+        """
+        Claim every link that needs downloading for a new run: pending links,
+        failed links with attempts left, and links abandoned by a crashed run.
+        Single-video links already in the archive are marked skipped instead.
+        The claim is one UPDATE, so concurrent runs never share a link.
+        """
+        batch_id = str(uuid.uuid4())
+        runnable = or_(
+            BatchItem.status == "pending",
+            and_(BatchItem.status == "failed", BatchItem.attempts < BATCH_MAX_ATTEMPTS),
+            and_(BatchItem.status.in_(["queued", "running"]),
+                 BatchItem.updated_at < datetime.now(timezone.utc) - BATCH_STALE_AFTER)
+        )
+
+        db = SessionLocal()
+        try:
+            candidates = {}
+            for item_id, url in db.query(BatchItem.id, BatchItem.url).filter(runnable):
+                vid = extract_video_id(url)
+                if vid:
+                    candidates[item_id] = vid
+            new_ids = set(archive_membership.filter_new(candidates.values()))
+            known = [item_id for item_id, vid in candidates.items() if vid not in new_ids]
+            skipped = 0
+            for i in range(0, len(known), BATCH_IMPORT_CHUNK_SIZE):
+                skipped += db.query(BatchItem).filter(BatchItem.id.in_(known[i:i + BATCH_IMPORT_CHUNK_SIZE])).update(
+                    {"status": "skipped", "last_error": "already downloaded"}, synchronize_session=False
+                )
+
+            count = db.query(BatchItem).filter(runnable).update(
+                {"status": "queued", "batch_id": batch_id, "flow_run_id": None}, synchronize_session=False
+            )
+            db.commit()
+            return {"batch_id": batch_id, "count": count, "skipped": skipped}
+        except Exception as e:
+            logger.error(f"Failed to start batch: {e}")
+            db.rollback()
+            raise e
+        finally:
+            db.close()
 
     @staticmethod
-    def _sync_to_file(content: str) -> None:
-        """Sync content to the links.txt file."""
+    def release_batch(batch_id: str) -> None:
+        """Return a run's unstarted links to pending (e.g. the flow run could not be created)."""
+        db = SessionLocal()
+        try:
+            db.query(BatchItem).filter(BatchItem.batch_id == batch_id, BatchItem.status == "queued").update(
+                {"status": "pending"}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_pending_items(batch_id: str) -> List[Dict]:
+        """Links claimed by a run that haven't started yet."""
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(BatchItem.id, BatchItem.url, BatchItem.platform)
+                .filter(BatchItem.batch_id == batch_id, BatchItem.status == "queued")
+                .order_by(BatchItem.id)
+                .all()
+            )
+            return [{"id": r.id, "url": r.url, "platform": r.platform} for r in rows]
+        finally:
+            db.close()
+
+    @staticmethod
+    def mark_running(item_id: int) -> None:
+        BatchService._update_item(item_id, {
+            "status": "running",
+            "attempts": BatchItem.attempts + 1,
+            "started_at": func.now(),
+            "finished_at": None
+        })
+
+    @staticmethod
+    def mark_finished(item_id: int, status: str, error: Optional[str] = None, result_count: int = 0) -> None:
+        BatchService._update_item(item_id, {
+            "status": status,
+            "last_error": error,
+            "result_count": result_count,
+            "finished_at": func.now()
+        })
+
+    @staticmethod
+    def set_flow_run(batch_id: str, flow_run_id: str) -> None:
+        db = SessionLocal()
+        try:
+            db.query(BatchItem).filter(BatchItem.batch_id == batch_id).update(
+                {"flow_run_id": flow_run_id}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_batch_status(batch_id: str) -> dict:
+        """Per-status counts for a batch run"""
+        db = SessionLocal()
+        try:
+            counts = dict(
+                db.query(BatchItem.status, func.count(BatchItem.id))
+                .filter(BatchItem.batch_id == batch_id)
+                .group_by(BatchItem.status)
+                .all()
+            )
+            return {"batch_id": batch_id, "total": sum(counts.values()), "statuses": counts}
+        finally:
+            db.close()
+
+    @staticmethod
+    def _update_item(item_id: int, fields: Dict) -> None:
+        db = SessionLocal()
+        try:
+            db.query(BatchItem).filter(BatchItem.id == item_id).update(fields, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to update batch item {item_id}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _sync_to_file() -> None:
+        """Write the stored links to the links.txt file."""
+        db = SessionLocal()
         try:
             os.makedirs(os.path.dirname(LINKS_FILE_PATH), exist_ok=True)
             with open(LINKS_FILE_PATH, 'w') as f:
-                f.write(content)
+                for (url,) in db.query(BatchItem.url).order_by(BatchItem.id).yield_per(5000):
+                    f.write(f"{url}\n")
             logger.info(f"Synced batch links to {LINKS_FILE_PATH}")
         except Exception as e:
             logger.error(f"Failed to sync to file: {e}")
+        finally:
+            db.close()
@@ -0,0 +1,110 @@
+import logging
+from typing import Any, Dict, Optional, Union
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from backend.db.session import SessionLocal
+from backend.models.pipeline_checkpoint import PipelineCheckpoint
+from backend.services.material_service import MaterialService
+
+logger = logging.getLogger(__name__)
+
+# Bump when a stage's output format or logic changes; older checkpoints are then ignored
+PIPELINE_VERSION = "1"
+
+# Processing stages in order, with the pipeline step numbers they implement
+PIPELINE_STAGES = ("analysis", "scoring", "clips")
+STAGE_STEPS = {1: "analysis", 3: "scoring", 5: "clips"}
+
+_MISSING = object()
+
+
+def resolve_stage(step: Union[str, int, None]) -> Optional[str]:
+    """Stage name for a force_from_step value ("scoring", 3 or "3"); None stays None."""
+    if step is None:
+        return None
+    if isinstance(step, int) or str(step).isdigit():
+        stage = STAGE_STEPS.get(int(step))
+    else:
+        stage = str(step) if str(step) in PIPELINE_STAGES else None
+    if stage is None:
+        raise ValueError(f"Unknown pipeline step: {step}. Use one of {list(PIPELINE_STAGES)} or {list(STAGE_STEPS)}")
+    return stage
+
+
+class CheckpointService:
+    """Stage outputs keyed by (video fingerprint, pipeline version, stage)."""
+
+    @staticmethod
+    def load(fingerprint: str, stage: str, params: Optional[Dict] = None) -> Any:
+        """Stored output of `stage`, or _MISSING when absent or produced with different params."""
+        db = SessionLocal()
+        try:
+            checkpoint = db.query(PipelineCheckpoint).filter(
+                PipelineCheckpoint.fingerprint == fingerprint,
+                PipelineCheckpoint.pipeline_version == PIPELINE_VERSION,
+                PipelineCheckpoint.stage == stage
+            ).first()
+            if checkpoint is None or (checkpoint.params or {}) != (params or {}):
+                return _MISSING
+            return checkpoint.output
+        except Exception as e:
+            logger.error(f"Failed to load checkpoint {stage} for {fingerprint}: {e}")
+            return _MISSING
+        finally:
+            db.close()
+
+    @staticmethod
+    def save(fingerprint: str, stage: str, output: Any, params: Optional[Dict] = None) -> None:
+        db = SessionLocal()
+        try:
+            stmt = pg_insert(PipelineCheckpoint).values(
+                fingerprint=fingerprint,
+                pipeline_version=PIPELINE_VERSION,
+                stage=stage,
+                params=params or {},
+                output=output
+            )
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_pipeline_checkpoints_key",
+                set_={"params": stmt.excluded.params, "output": stmt.excluded.output, "created_at": stmt.excluded.created_at}
+            )
+            db.execute(stmt)
+            db.commit()
+        except Exception as e:
+            # A missing checkpoint only costs a recompute on the next run
+            logger.error(f"Failed to save checkpoint {stage} for {fingerprint}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    @staticmethod
+    def invalidate_from(fingerprint: str, stage: str) -> int:
+        """Drop the checkpoints of `stage` and every stage after it."""
+        stages = PIPELINE_STAGES[PIPELINE_STAGES.index(stage):]
+        db = SessionLocal()
+        try:
+            count = db.query(PipelineCheckpoint).filter(
+                PipelineCheckpoint.fingerprint == fingerprint,
+                PipelineCheckpoint.stage.in_(stages)
+            ).delete(synchronize_session=False)
+            db.commit()
+            return count
+        finally:
+            db.close()
+
+    @staticmethod
+    def record_stage(video_path: str, fingerprint: str, stage: Optional[str]) -> None:
+        """Mark the material for `video_path` as having completed `stage`."""
+        db = SessionLocal()
+        try:
+            MaterialService(db).update_pipeline_stage(video_path, fingerprint, stage)
+        except Exception as e:
+            logger.error(f"Failed to record pipeline stage for {video_path}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    @staticmethod
+    def is_missing(value: Any) -> bool:
+        return value is _MISSING
@@ -1,10 +1,16 @@
 import logging
+import threading
+import time
+from typing import Optional
 from pydantic import BaseModel
 from backend.db.session import SessionLocal
 from backend.models.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+# How long cached settings are trusted before re-checking Settings.updated_at
+SETTINGS_CHECK_SECONDS = 5.0
+
 class SettingsModel(BaseModel):
     vendor: str = "custom"
     api_base: str = "https://api.openai.com/v1"
@@ -12,31 +18,107 @@ class SettingsModel(BaseModel):
     vl_model: str = "gpt-4-vision-preview"
     cookies_path: str = "/app/data/cookies.txt"
     proxy_url: str = ""  # Optional proxy for yt-dlp downloads
+    download_concurrency: int = 4  # Batch downloads in flight at once
+    download_per_platform: int = 2  # ...of which on the same platform
+    download_min_interval: float = 2.0  # Seconds between starts on one platform
+    ai_max_concurrency: int = 8  # AI requests in flight at once, per worker process
+    ai_rpm_limit: Optional[int] = None  # Provider requests per minute, None = unlimited
+    ai_tpm_limit: Optional[int] = None  # Provider tokens per minute, None = unlimited
 
-class ConfigService:
-    @staticmethod
-    def load_settings() -> SettingsModel:
-        """Load settings from DB or return defaults."""
-        db = SessionLocal()
+class SettingsCache:
+    """
+    Process-wide settings, reloaded only when the settings row changes.
+
+    Within `check_interval` of the last check the cached copy is returned
+    without touching the database; after that only `updated_at` is read and
+    the full row is reloaded if it moved. A save in another process is
+    therefore seen within `check_interval` seconds.
+    """
+
+    def __init__(self, check_interval: float = SETTINGS_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self.version: Optional[str] = None
+        self._settings: Optional[SettingsModel] = None
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+
+    def get(self) -> SettingsModel:
+        settings = self._settings
+        if settings is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return settings.model_copy(deep=True)
+
+        # Only one thread reloads; the others keep using the current copy
+        if not self._reload_lock.acquire(blocking=settings is None):
+            return settings.model_copy(deep=True)
         try:
-            settings_db = db.query(Settings).filter(Settings.id == 1).first()
-            if not settings_db:
-                return SettingsModel()
-            
-            return SettingsModel(
-                vendor=settings_db.vendor,
-                api_base=settings_db.api_base,
-                api_key=settings_db.api_key or "",
-                vl_model=settings_db.vl_model,
-                cookies_path=settings_db.cookies_path or "/app/data/cookies.txt",
-                proxy_url=settings_db.extra.get("proxy_url", "") if settings_db.extra else ""
-            )
+            self._refresh()
         except Exception as e:
-            logger.error(f"Failed to load settings from DB: {e}")
-            return SettingsModel()
+            if self._settings is None:
+                logger.error(f"Failed to load settings from DB: {e}")
+                return SettingsModel()
+            logger.error(f"Settings refresh failed, keeping version {self.version}: {e}")
+        finally:
+            self._reload_lock.release()
+        return self._settings.model_copy(deep=True)
+
+    def get_version(self) -> str:
+        """Identifies the loaded settings; changes whenever they are saved"""
+        self.get()
+        return self.version
+
+    def invalidate(self) -> None:
+        """Force a check on the next lookup"""
+        self._checked_at = 0.0
+
+    def _refresh(self) -> None:
+        db = SessionLocal()
+        try:
+            updated_at = db.query(Settings.updated_at).filter(Settings.id == 1).scalar()
+            version = updated_at.isoformat() if updated_at else "default"
+            if self._settings is None or version != self.version:
+                settings_db = db.query(Settings).filter(Settings.id == 1).first()
+                self._settings, self.version = ConfigService._to_model(settings_db), version
+                logger.info(f"Loaded settings version {version}")
+            self._checked_at = time.monotonic()
         finally:
             db.close()
 
+
+settings_cache = SettingsCache()
+
+
+class ConfigService:
+    @staticmethod
+    def load_settings() -> SettingsModel:
+        """Load settings (cached per process) or return defaults."""
+        return settings_cache.get()
+
+    @staticmethod
+    def get_version() -> str:
+        """Version of the current settings, for caches keyed on them"""
+        return settings_cache.get_version()
+
+    @staticmethod
+    def _to_model(settings_db: Optional[Settings]) -> SettingsModel:
+        if not settings_db:
+            return SettingsModel()
+        
+        extra = settings_db.extra or {}
+        return SettingsModel(
+            vendor=settings_db.vendor,
+            api_base=settings_db.api_base,
+            api_key=settings_db.api_key or "",
+            vl_model=settings_db.vl_model,
+            cookies_path=settings_db.cookies_path or "/app/data/cookies.txt",
+            proxy_url=extra.get("proxy_url", ""),
+            download_concurrency=extra.get("download_concurrency", 4),
+            download_per_platform=extra.get("download_per_platform", 2),
+            download_min_interval=extra.get("download_min_interval", 2.0),
+            ai_max_concurrency=extra.get("ai_max_concurrency", 8),
+            ai_rpm_limit=extra.get("ai_rpm_limit"),
+            ai_tpm_limit=extra.get("ai_tpm_limit")
+        )
+
     @staticmethod
     def save_settings(settings: SettingsModel) -> None:
         """Save settings to DB."""
@@ -52,9 +134,18 @@ class ConfigService:
             db_obj.api_key = settings.api_key
             db_obj.vl_model = settings.vl_model
             db_obj.cookies_path = settings.cookies_path
-            db_obj.extra = {"proxy_url": settings.proxy_url}
+            db_obj.extra = {
+                "proxy_url": settings.proxy_url,
+                "download_concurrency": settings.download_concurrency,
+                "download_per_platform": settings.download_per_platform,
+                "download_min_interval": settings.download_min_interval,
+                "ai_max_concurrency": settings.ai_max_concurrency,
+                "ai_rpm_limit": settings.ai_rpm_limit,
+                "ai_tpm_limit": settings.ai_tpm_limit
+            }
             
             db.commit()
+            settings_cache.invalidate()
             logger.info("Settings saved to DB.")
         except Exception as e:
             logger.error(f"Failed to save settings: {e}")
@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Defaults for batch downloads; overridable per run
+DOWNLOAD_MAX_CONCURRENCY = 4
+DOWNLOAD_PER_PLATFORM_CONCURRENCY = 2
+DOWNLOAD_MIN_INTERVAL = 2.0  # seconds between starts on the same platform
+
+
+class DownloadThrottle:
+    """
+    Concurrency and politeness limits for one batch run.
+
+    A download holds a per-platform slot and a global slot while it runs, and
+    downloads on the same platform start at least `min_interval` seconds apart.
+    The platform slot is taken first so a busy platform never ties up global
+    slots that other platforms could use.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = DOWNLOAD_MAX_CONCURRENCY,
+                 per_platform: int = DOWNLOAD_PER_PLATFORM_CONCURRENCY,
+                 min_interval: float = DOWNLOAD_MIN_INTERVAL):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_platform = max(1, per_platform)
+        self.min_interval = max(0.0, min_interval)
+        self._global = threading.BoundedSemaphore(self.max_concurrency)
+        self._platforms: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, platform: str):
+        with self._platform_semaphore(platform):
+            self._wait_turn(platform)
+            with self._global:
+                yield
+
+    def _platform_semaphore(self, platform: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._platforms.get(platform)
+            if sem is None:
+                sem = self._platforms[platform] = threading.BoundedSemaphore(self.per_platform)
+            return sem
+
+    def _wait_turn(self, platform: str) -> None:
+        # Reserve the next start time under the lock, then sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(platform, 0.0))
+            self._next_start[platform] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_throttles: Dict[str, DownloadThrottle] = {}
+_throttles_lock = threading.Lock()
+
+
+def get_throttle(batch_id: str, **limits) -> DownloadThrottle:
+    """Shared throttle for every task of a batch run (tasks run as threads of the flow process)"""
+    with _throttles_lock:
+        throttle = _throttles.get(batch_id)
+        if throttle is None:
+            throttle = _throttles[batch_id] = DownloadThrottle(**limits)
+        return throttle
+
+
+def release_throttle(batch_id: str) -> None:
+    with _throttles_lock:
+        _throttles.pop(batch_id, None)
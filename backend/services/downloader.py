@@ -6,10 +6,16 @@ from typing import Dict, Any, Optional, List, Callable
 logger = logging.getLogger(__name__)
 
 class VideoDownloader:
-    def __init__(self, output_dir: str = "/app/data/raw", cookies_path: Optional[str] = None, proxy: Optional[str] = None):
+    def __init__(self,
+                 output_dir: str = "/app/data/raw",
+                 cookies_path: Optional[str] = None,
+                 proxy: Optional[str] = None,
+                 skip_video: Optional[Callable[[str], bool]] = None):
         self.output_dir = output_dir
         self.cookies_path = cookies_path
         self.proxy = proxy
+        # Returns True for video ids that are already downloaded
+        self.skip_video = skip_video
 
     def download(self, 
                  url: str, 
@@ -51,6 +57,10 @@ class VideoDownloader:
         if options:
             ydl_opts.update(options)
 
+        # Prune known ids before yt-dlp resolves or downloads them
+        if self.skip_video and 'match_filter' not in ydl_opts:
+            ydl_opts['match_filter'] = self._match_filter
+
         # Add progress hook
         if progress_hook:
             ydl_opts['progress_hooks'] = [progress_hook]
@@ -79,6 +89,17 @@ class VideoDownloader:
             
         return results
 
+    def _match_filter(self, info: Dict, *, incomplete: bool = False) -> Optional[str]:
+        """
+        yt-dlp match_filter hook. Playlist entries are checked with
+        incomplete=True before they are extracted, so known videos in a
+        channel are skipped without any per-video requests.
+        """
+        video_id = info.get('id')
+        if video_id and self.skip_video(str(video_id)):
+            return f"{video_id} is already in the download archive"
+        return None
+
     def _process_entry(self, entry: Dict) -> Dict:
         """Process info dict into a standardized format"""
         # Determine actual filename (yt-dlp usually adds it to '_filename' key in hooks, 
@@ -100,5 +121,6 @@ class VideoDownloader:
             'filepath': filepath,
             'thumbnail': entry.get('thumbnail'),
             'webpage_url': entry.get('webpage_url'),
+            'platform': (entry.get('extractor_key') or 'unknown').lower(),
             'meta_platform': 'tiktok' if 'tiktok' in entry.get('webpage_url', '') else 'other'
         }
@@ -0,0 +1,130 @@
+import ffmpeg
+import math
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Longest image side each VL provider handles without extra tiling cost
+PROVIDER_TILE_SIZES = {
+    "openai": 512,
+    "azure": 512,
+    "qwen": 448,
+    "dashscope": 448,
+    "gemini": 768,
+}
+DEFAULT_TILE_SIZE = 768
+
+
+def tile_size_for(provider_name: Optional[str]) -> int:
+    return PROVIDER_TILE_SIZES.get((provider_name or "").lower(), DEFAULT_TILE_SIZE)
+
+
+def split_jpeg_stream(data: bytes) -> List[bytes]:
+    """
+    Split concatenated JPEGs from an image2pipe stream.
+    Walks marker segments rather than searching for EOI, since FFD9 can
+    legitimately appear inside table payloads.
+    """
+    frames = []
+    pos = 0
+    size = len(data)
+    while True:
+        start = data.find(b'\xff\xd8', pos)
+        if start < 0:
+            break
+        i = start + 2
+        end = None
+        while i + 1 < size:
+            if data[i] != 0xFF:
+                i += 1
+                continue
+            marker = data[i + 1]
+            if marker == 0xDA:
+                # Start of scan: skip the header, then entropy-coded data until a real marker
+                i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+                # Only 0xFF bytes can start one, so jump between them instead of stepping
+                while True:
+                    i = data.find(b'\xff', i)
+                    if i < 0 or i + 1 >= size:
+                        i = size
+                        break
+                    following = data[i + 1]
+                    if following != 0x00 and not 0xD0 <= following <= 0xD7:
+                        break
+                    # Stuffed byte or restart marker
+                    i += 2
+                continue
+            if marker == 0xD9:
+                end = i + 2
+                break
+            if marker == 0xFF or 0xD0 <= marker <= 0xD7:
+                # Fill byte or restart marker, no length field
+                i += 2 if marker != 0xFF else 1
+                continue
+            i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+        if end is None:
+            break
+        frames.append(data[start:end])
+        pos = end
+    return frames
+
+
+class FramePacker:
+    """
+    Prepare JPEG frames for VL requests. Every operation is one ffmpeg process
+    fed over stdin, so nothing touches the disk.
+    """
+
+    def __init__(self, quality: int = 3):
+        # mjpeg q:v, 2 (best) - 31 (worst)
+        self.quality = quality
+
+    def resize(self, frames: List[bytes], max_dimension: int) -> List[bytes]:
+        """Downscale each frame to fit within max_dimension (never upscaled)"""
+        if not frames:
+            return []
+        stream = (
+            ffmpeg
+            .input('pipe:', format='image2pipe', vcodec='mjpeg')
+            .filter('scale', f"min({max_dimension},iw)", f"min({max_dimension},ih)",
+                    force_original_aspect_ratio='decrease')
+        )
+        resized = split_jpeg_stream(self._run(stream, b''.join(frames)))
+        if len(resized) != len(frames):
+            raise ValueError(f"Expected {len(frames)} resized frames, got {len(resized)}")
+        return resized
+
+    def contact_sheet(self, frames: List[bytes], tile_size: int, columns: Optional[int] = None) -> bytes:
+        """
+        Tile frames into one image, left to right then top to bottom.
+        Each cell is tile_size x tile_size, letterboxed to keep aspect ratio.
+        """
+        if not frames:
+            raise ValueError("No frames to tile")
+        columns = columns or math.ceil(math.sqrt(len(frames)))
+        rows = math.ceil(len(frames) / columns)
+        stream = (
+            ffmpeg
+            .input('pipe:', format='image2pipe', vcodec='mjpeg')
+            .filter('scale', tile_size, tile_size, force_original_aspect_ratio='decrease')
+            .filter('pad', tile_size, tile_size, '(ow-iw)/2', '(oh-ih)/2')
+            # tile flushes the partially filled last sheet at end of input
+            .filter('tile', f"{columns}x{rows}")
+        )
+        sheets = split_jpeg_stream(self._run(stream, b''.join(frames)))
+        if not sheets:
+            raise ValueError("Contact sheet render produced no image")
+        return sheets[0]
+
+    def _run(self, stream, data: bytes) -> bytes:
+        try:
+            out, _ = (
+                stream
+                .output('pipe:', format='image2pipe', vcodec='mjpeg', **{'q:v': self.quality})
+                .run(input=data, capture_stdout=True, capture_stderr=True)
+            )
+            return out
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg frame packing error: {e.stderr.decode('utf8')}")
+            raise e
@@ -0,0 +1,124 @@
+import unicodedata
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import opencc
+    _t2s = opencc.OpenCC("t2s")
+except Exception:
+    _t2s = None
+
+# Traditional -> Simplified fallback for when OpenCC isn't installed.
+# Covers the characters that show up most in ad copy and risk terms.
+_T2S_FALLBACK = str.maketrans(
+    "廣告優惠價購買賣費產品體驗質點擊鏈關注東發貨這個們會說時來為與對過還後開錢銷藥療醫減肥證絕國際網頁號碼電話視頻導賬戶"
+    "寶貝級專業獎勵禮閱讀讓適應當實現營養護膚膠囊減輕癥狀療效權威獨家搶購限時秒殺熱賣爆款優質團隊聯繫條線務勞動頭髮車險貸劑準",
+    "广告优惠价购买卖费产品体验质点击链关注东发货这个们会说时来为与对过还后开钱销药疗医减肥证绝国际网页号码电话视频导账户"
+    "宝贝级专业奖励礼阅读让适应当实现营养护肤胶囊减轻症状疗效权威独家抢购限时秒杀热卖爆款优质团队联系条线务劳动头发车险贷剂准"
+)
+
+
+def normalize_char(ch: str) -> str:
+    """Full-width -> half-width (NFKC), case folding, traditional -> simplified"""
+    out = unicodedata.normalize("NFKC", ch).casefold()
+    if _t2s is not None:
+        return _t2s.convert(out)
+    return out.translate(_T2S_FALLBACK)
+
+
+def normalize_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """
+    Normalize text char by char, keeping for every normalized char the index
+    of the original char it came from, so matches map back to the raw text.
+    """
+    chars = []
+    offsets = []
+    for i, ch in enumerate(text):
+        for n in normalize_char(ch):
+            chars.append(n)
+            offsets.append(i)
+    return "".join(chars), offsets
+
+
+def normalize_text(text: str) -> str:
+    return "".join(normalize_char(ch) for ch in text)
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str   # keyword as configured, not normalized
+    category: str
+    start: int     # offsets into the original text, end exclusive
+    end: int
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over normalized keywords.
+    Built once, then every text is scanned in a single pass regardless of
+    how many keywords there are.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, str]]):
+        """
+        Args:
+            keywords: (keyword, category) pairs, e.g. [("free", "negative"), ("优惠", "positive")]
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Patterns ending at each state: (keyword, category, normalized length)
+        self._out: List[List[Tuple[str, str, int]]] = [[]]
+        self.size = 0
+
+        for keyword, category in keywords:
+            pattern = normalize_text(keyword.strip()) if keyword else ""
+            if not pattern:
+                continue
+            self._add(pattern, keyword, category)
+            self.size += 1
+        self._build_failure_links()
+
+    def _add(self, pattern: str, keyword: str, category: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((keyword, category, len(pattern)))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                # Depth-1 states keep fail = root; deeper ones follow the parent's chain
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                # Inherit matches of the longest proper suffix
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> List[KeywordMatch]:
+        """All (possibly overlapping) keyword occurrences in text"""
+        if not text or not self.size:
+            return []
+        normalized, offsets = normalize_with_offsets(text)
+        matches = []
+        state = 0
+        for i, ch in enumerate(normalized):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for keyword, category, length in self._out[state]:
+                start = offsets[i - length + 1]
+                matches.append(KeywordMatch(keyword, category, start, offsets[i] + 1))
+        return matches
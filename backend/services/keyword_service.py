@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.db.session import SessionLocal
+from backend.models.settings import Keyword, KeywordSetVersion
+from backend.services.kw_detector import KeywordDetector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORIES = ("productType", "contentType", "emotion")
+
+# How long a cached keyword index is trusted before re-checking the version
+KEYWORD_VERSION_CHECK_SECONDS = 5.0
+
+
+class KeywordService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_version(self) -> int:
+        version = self.db.query(KeywordSetVersion.version).filter(KeywordSetVersion.id == 1).scalar()
+        return version or 0
+
+    def get_config(self) -> Dict:
+        result = {
+            "positive": [],
+            "negative": [],
+            "categories": {name: [] for name in DEFAULT_CATEGORIES}
+        }
+
+        for k in self.db.query(Keyword).all():
+            if k.category == "positive":
+                result["positive"].append(k.text)
+            elif k.category == "negative":
+                result["negative"].append(k.text)
+            else:
+                # Custom category
+                result["categories"].setdefault(k.category, []).append(k.text)
+
+        return result
+
+    def save_config(self, positive: List[str], negative: List[str], categories: Dict[str, List[str]]) -> Dict:
+        """
+        Apply a keyword config as a diff: only changed rows are inserted, updated or deleted.
+        Bumps the keyword set version in the same transaction when anything changed.
+        """
+        # text is unique across categories; later sections win, as with the old full replace
+        desired = {}
+        for text in positive:
+            if text:
+                desired[text] = "positive"
+        for text in negative:
+            if text:
+                desired[text] = "negative"
+        for cat_name, texts in categories.items():
+            for text in texts:
+                if text:
+                    desired[text] = cat_name
+
+        try:
+            existing = {k.text: k for k in self.db.query(Keyword).all()}
+
+            removed = [text for text in existing if text not in desired]
+            added = [text for text in desired if text not in existing]
+            updated = 0
+            for text, category in desired.items():
+                row = existing.get(text)
+                if row is not None and row.category != category:
+                    row.category = category
+                    updated += 1
+
+            for i in range(0, len(removed), 1000):
+                self.db.query(Keyword).filter(Keyword.text.in_(removed[i:i + 1000])).delete(synchronize_session=False)
+            self.db.add_all([Keyword(text=text, category=desired[text]) for text in added])
+
+            changed = bool(removed or added or updated)
+            if changed:
+                self._bump_version()
+            self.db.commit()
+
+            logger.info(f"Keywords saved: +{len(added)} -{len(removed)} ~{updated}")
+            return {"added": len(added), "removed": len(removed), "updated": updated, "changed": changed}
+        except Exception as e:
+            self.db.rollback()
+            raise e
+
+    def _bump_version(self) -> None:
+        bumped = (
+            self.db.query(KeywordSetVersion)
+            .filter(KeywordSetVersion.id == 1)
+            .update({KeywordSetVersion.version: KeywordSetVersion.version + 1}, synchronize_session=False)
+        )
+        if not bumped:
+            self.db.add(KeywordSetVersion(id=1, version=1))
+
+
+class KeywordIndexCache:
+    """
+    Process-wide compiled keyword index, reloaded only when the keyword set version changes.
+
+    Reloads build a new detector off to the side and swap the reference, so
+    detection keeps running on the previous index while an edit is applied.
+
+    Nothing in the pipeline runs keyword detection yet; callers that add it
+    should use keyword_index.get_detector() instead of building a KeywordDetector.
+    """
+
+    def __init__(self, check_interval: float = KEYWORD_VERSION_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self.version: Optional[int] = None
+        self._detector: Optional[KeywordDetector] = None
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+
+    def get_detector(self) -> KeywordDetector:
+        detector = self._detector
+        if detector is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return detector
+
+        # Only one thread reloads; the others keep using the current index
+        if not self._reload_lock.acquire(blocking=detector is None):
+            return detector
+        try:
+            self._refresh()
+        except Exception as e:
+            if self._detector is None:
+                raise e
+            logger.error(f"Keyword index refresh failed, keeping version {self.version}: {e}")
+        finally:
+            self._reload_lock.release()
+        return self._detector
+
+    def invalidate(self) -> None:
+        """Force a version check on the next lookup"""
+        self._checked_at = 0.0
+
+    def _refresh(self) -> None:
+        db = SessionLocal()
+        try:
+            service = KeywordService(db)
+            version = service.get_version()
+            if self._detector is None or version != self.version:
+                config = service.get_config()
+                detector = KeywordDetector(config["positive"], config["negative"])
+                self._detector, self.version = detector, version
+                logger.info(f"Loaded keyword index version {version}")
+            self._checked_at = time.monotonic()
+        finally:
+            db.close()
+
+
+keyword_index = KeywordIndexCache()
@@ -1,40 +1,128 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional
+from functools import lru_cache
 import logging
+from backend.services.keyword_automaton import KeywordAutomaton
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=8)
+def compile_keywords(positive: Tuple[str, ...], negative: Tuple[str, ...]) -> KeywordAutomaton:
+    """Build (or reuse) the automaton for a keyword set"""
+    pairs = [(kw, "positive") for kw in positive] + [(kw, "negative") for kw in negative]
+    automaton = KeywordAutomaton(pairs)
+    logger.info(f"Compiled keyword automaton with {automaton.size} keywords")
+    return automaton
+
 class KeywordDetector:
     def __init__(self, positive_keywords: List[str], negative_keywords: List[str]):
         self.positive = positive_keywords
         self.negative = negative_keywords
+        self.automaton = compile_keywords(tuple(positive_keywords), tuple(negative_keywords))
+
+    def timeline(self, max_gap: float = 1.5) -> "KeywordTimelineDetector":
+        """Streaming detector producing time intervals, sharing this detector's automaton"""
+        return KeywordTimelineDetector(self.automaton, max_gap=max_gap)
 
     async def detect(self, text_content: str, frame_ocr_results: List[str]) -> Dict:
         """
         Detect keywords in text (transcript) and OCR results.
-        Uses exact string matching for efficiency.
+        Each text is scanned once by an Aho-Corasick automaton, with
+        full-width/half-width, case and traditional/simplified differences
+        normalized away.
         """
-        found_positive = []
-        found_negative = []
-        
-        # Check transcript
-        for kw in self.positive:
-            if kw in text_content:
-                found_positive.append(kw)
-        for kw in self.negative:
-            if kw in text_content:
-                found_negative.append(kw)
-                
-        # Check OCR
-        for frame_text in frame_ocr_results:
-             for kw in self.positive:
-                if kw in frame_text and kw not in found_positive:
-                    found_positive.append(kw)
-             for kw in self.negative:
-                if kw in frame_text and kw not in found_negative:
-                    found_negative.append(kw)
-                    
+        # dicts keep first-seen order and give O(1) dedup
+        found_positive = {}
+        found_negative = {}
+        matches = []
+
+        sources = [("transcript", None, text_content)]
+        sources += [("ocr", i, frame_text) for i, frame_text in enumerate(frame_ocr_results)]
+
+        for source, frame_index, text in sources:
+            for m in self.automaton.scan(text or ""):
+                found = found_positive if m.category == "positive" else found_negative
+                found[m.keyword] = True
+                matches.append({
+                    "keyword": m.keyword,
+                    "category": m.category,
+                    "source": source,
+                    "frame_index": frame_index,
+                    "start": m.start,
+                    "end": m.end
+                })
+
         return {
-            "positive_matches": found_positive,
-            "negative_matches": found_negative,
-            "has_risk": len(found_negative) > 0
+            "positive_matches": list(found_positive),
+            "negative_matches": list(found_negative),
+            "has_risk": len(found_negative) > 0,
+            "matches": matches
         }
+
+class KeywordTimelineDetector:
+    """
+    Streaming keyword detection over a timeline of OCR frames and transcript segments.
+
+    Feed `(timestamp, text, source)` events in roughly chronological order.
+    Hits of the same keyword less than `max_gap` seconds apart are merged into
+    one interval; an interval is emitted as soon as it can no longer grow, so
+    only currently open intervals are held in memory however long the video is.
+    """
+
+    def __init__(self, automaton: KeywordAutomaton, max_gap: float = 1.5):
+        self.automaton = automaton
+        self.max_gap = max_gap
+        self._open: Dict[Tuple[str, str], Dict] = {}
+
+    def feed(self, timestamp: float, text: str, source: str, end: Optional[float] = None) -> List[Dict]:
+        """
+        Process one event and return the intervals it closed.
+
+        Args:
+            timestamp: Event time in seconds (frame time, or segment start for transcripts)
+            source: "ocr", "transcript", ...
+            end: Segment end for events that span time (transcripts); defaults to timestamp
+        """
+        end = timestamp if end is None else end
+        closed = self._close_before(timestamp)
+
+        for m in self.automaton.scan(text or ""):
+            key = (m.keyword, m.category)
+            interval = self._open.get(key)
+            if interval is None:
+                self._open[key] = {
+                    "keyword": m.keyword,
+                    "category": m.category,
+                    "start": timestamp,
+                    "end": end,
+                    "hits": 1,
+                    "sources": {source}
+                }
+            else:
+                interval["start"] = min(interval["start"], timestamp)
+                interval["end"] = max(interval["end"], end)
+                interval["hits"] += 1
+                interval["sources"].add(source)
+
+        return closed
+
+    def flush(self) -> List[Dict]:
+        """Close and return every open interval (call at end of stream)"""
+        return self._close_before(float("inf"))
+
+    def _close_before(self, timestamp: float) -> List[Dict]:
+        closed = []
+        for key in [k for k, iv in self._open.items() if timestamp - iv["end"] > self.max_gap]:
+            interval = self._open.pop(key)
+            interval["sources"] = sorted(interval["sources"])
+            closed.append(interval)
+        closed.sort(key=lambda iv: iv["start"])
+        return closed
+
+def detect_timeline(detector: KeywordDetector,
+                    events: Iterable[Tuple[float, str, str]],
+                    max_gap: float = 1.5) -> Iterator[Dict]:
+    """Yield merged keyword hit intervals for a stream of (timestamp, text, source) events"""
+    timeline = detector.timeline(max_gap=max_gap)
+    for event in events:
+        yield from timeline.feed(*event)
+    yield from timeline.flush()
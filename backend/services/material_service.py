@@ -39,3 +39,11 @@ class MaterialService:
             self.db.commit()
             self.db.refresh(obj)
         return obj
+
+    def update_pipeline_stage(self, filepath: str, fingerprint: str, stage: Optional[str]) -> int:
+        """Record the last completed pipeline stage on the material(s) for a file"""
+        count = self.db.query(Material).filter(Material.filepath == filepath).update(
+            {"fingerprint": fingerprint, "pipeline_stage": stage}, synchronize_session=False
+        )
+        self.db.commit()
+        return count
@@ -0,0 +1,131 @@
+import ffmpeg
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from fractions import Fraction
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# On-disk tier, shared by the API and all workers through the data volume
+PROBE_CACHE_DIR = "/app/data/cache/probe"
+
+
+def parse_rational(value, default: float = 0.0) -> float:
+    """
+    Parse an ffprobe rational such as '30000/1001' or '25' without eval.
+    Returns `default` for missing or degenerate values like '0/0'.
+    """
+    if value in (None, "", "N/A"):
+        return default
+    try:
+        return float(Fraction(str(value)))
+    except (ValueError, ZeroDivisionError):
+        return default
+
+
+class ProbeCache:
+    """
+    Two-tier cache for ffprobe output.
+    Entries are keyed by file identity (path, size, mtime, inode), so a
+    rewritten file is probed again while an untouched one never is.
+    """
+
+    def __init__(self, max_entries: int = 1024, cache_dir: Optional[str] = PROBE_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def probe(self, input_path: str) -> Dict:
+        """Return the full ffprobe result (streams + format) for a file."""
+        key = self._file_key(input_path)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return cached
+
+        cached = self._load_from_disk(key)
+        if cached is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(key, cached)
+            return cached
+
+        probe = ffmpeg.probe(input_path)
+        with self._lock:
+            self.misses += 1
+        self._remember(key, probe)
+        self._save_to_disk(key, probe)
+        return probe
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+
+    def clear(self) -> None:
+        """Drop the in-process tier (the disk tier is keyed by identity and never goes stale)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _file_key(self, input_path: str) -> Tuple:
+        st = os.stat(input_path)
+        return (os.path.realpath(input_path), st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def _remember(self, key: Tuple, probe: Dict) -> None:
+        with self._lock:
+            self._entries[key] = probe
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: Tuple) -> str:
+        digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def _load_from_disk(self, key: Tuple) -> Optional[Dict]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable probe cache entry {path}: {e}")
+            return None
+
+    def _save_to_disk(self, key: Tuple, probe: Dict) -> None:
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(probe, f)
+            # Atomic so concurrent workers never read a half-written entry
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to persist probe cache entry: {e}")
+
+
+# Process-wide instance shared by every VideoProcessor
+probe_cache = ProbeCache()
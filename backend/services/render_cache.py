@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Shared by all workers through the data volume
+RENDER_CACHE_DIR = "/app/data/cache/render"
+RENDER_CACHE_MAX_BYTES = 50 * 1024 ** 3
+# Stores only add to a running size total; the cache directory is re-walked when the
+# total goes over max_bytes, or after this long, to pick up other workers' artifacts
+RENDER_CACHE_RESCAN_INTERVAL = 300.0
+
+# ioctl request for a copy-on-write clone (btrfs, xfs, overlayfs on those)
+_FICLONE = 0x40049409
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+_fingerprints: "OrderedDict[Tuple, str]" = OrderedDict()
+_fingerprints_lock = threading.Lock()
+
+
+def content_fingerprint(path: str) -> str:
+    """
+    Hash of a file's content, memoized by file identity (path, size, mtime, inode)
+    so an unchanged file is only read once per process.
+    """
+    st = os.stat(path)
+    identity = (os.path.realpath(path), st.st_size, st.st_mtime_ns, st.st_ino)
+    with _fingerprints_lock:
+        cached = _fingerprints.get(identity)
+        if cached is not None:
+            _fingerprints.move_to_end(identity)
+            return cached
+
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    fingerprint = digest.hexdigest()
+
+    with _fingerprints_lock:
+        _fingerprints[identity] = fingerprint
+        while len(_fingerprints) > 4096:
+            _fingerprints.popitem(last=False)
+    return fingerprint
+
+
+class RenderCache:
+    """
+    Content-addressable store for ffmpeg outputs.
+    The key is a hash of the input fingerprints plus the normalized ffmpeg
+    arguments; hits are materialized as a reflink or copy of the artifact.
+    Outputs never share an inode with the cache, so a later ffmpeg run that
+    overwrites an output path in place cannot corrupt a cached artifact.
+    """
+
+    def __init__(self, cache_dir: str = RENDER_CACHE_DIR, max_bytes: int = RENDER_CACHE_MAX_BYTES, enabled: bool = True,
+                 rescan_interval: float = RENDER_CACHE_RESCAN_INTERVAL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        # Running total of the cache size; None until the first walk
+        self._size: Optional[int] = None
+        self._scanned_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, operation: str, input_paths: List[str], args: List[str]) -> str:
+        payload = {
+            "operation": operation,
+            "inputs": [content_fingerprint(p) for p in input_paths],
+            "args": args,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def artifact_path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}{ext}")
+
+    def temp_path(self, ext: str) -> str:
+        """Scratch output on the cache filesystem, so storing it is a rename"""
+        tmp_dir = os.path.join(self.cache_dir, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        return os.path.join(tmp_dir, f"{uuid.uuid4().hex}{ext}")
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Materialize a cached artifact at output_path. Returns False on a miss."""
+        artifact = self.artifact_path(key, os.path.splitext(output_path)[1])
+        if not os.path.exists(artifact):
+            with self._lock:
+                self.misses += 1
+            return False
+
+        try:
+            # Bump mtime: eviction is least-recently-used by mtime
+            os.utime(artifact)
+            self._materialize(artifact, output_path)
+        except OSError as e:
+            logger.warning(f"Render cache entry {artifact} unusable: {e}")
+            with self._lock:
+                self.misses += 1
+            return False
+
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key: str, rendered_path: str, output_path: str) -> None:
+        """Move a freshly rendered file into the cache and materialize it at output_path."""
+        artifact = self.artifact_path(key, os.path.splitext(output_path)[1])
+        os.makedirs(os.path.dirname(artifact), exist_ok=True)
+        os.replace(rendered_path, artifact)
+        self._materialize(artifact, output_path)
+        self._added(os.path.getsize(artifact))
+
+    def store_copy(self, key: str, output_path: str) -> None:
+        """Add an output that was rendered in place to the cache; the output itself is left alone."""
+        ext = os.path.splitext(output_path)[1]
+        artifact = self.artifact_path(key, ext)
+        tmp_path = self.temp_path(ext)
+        try:
+            self._clone(output_path, tmp_path)
+            os.makedirs(os.path.dirname(artifact), exist_ok=True)
+            os.replace(tmp_path, artifact)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._added(os.path.getsize(artifact))
+
+    def _added(self, size: int) -> None:
+        """Count a stored artifact; walk the cache only when it may be over budget or the total is stale"""
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+            due = (self._size is None or self._size > self.max_bytes
+                   or time.monotonic() - self._scanned_at >= self.rescan_interval)
+        if due:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop least-recently-used artifacts until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.cache_dir):
+            if os.path.basename(root) == "tmp":
+                continue
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    logger.info(f"Evicted render cache entry {path}")
+                except FileNotFoundError:
+                    pass
+
+        with self._lock:
+            self._size = total
+            self._scanned_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _materialize(self, artifact: str, output_path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        if os.path.lexists(output_path):
+            # Replace rather than write through whatever is at the path
+            os.remove(output_path)
+        self._clone(artifact, output_path)
+
+    def _clone(self, src_path: str, dst_path: str) -> None:
+        """Reflink if the filesystem supports it, else copy. Never a hardlink: see class docstring."""
+        try:
+            with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return
+        except OSError:
+            if os.path.exists(dst_path):
+                os.remove(dst_path)
+        shutil.copy2(src_path, dst_path)
+
+
+# Process-wide instance shared by every VideoProcessor
+render_cache = RenderCache()
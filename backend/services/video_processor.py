@@ -1,104 +1,382 @@
 import ffmpeg
 import os
+import re
+import math
+import bisect
+import glob
+import shutil
+import tempfile
 import logging
-from typing import Optional, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, Dict, List, Callable
+from backend.services.probe_cache import ProbeCache, parse_rational, probe_cache as default_probe_cache
+from backend.services.render_cache import RenderCache, render_cache as default_render_cache
+from backend.services.frame_packer import split_jpeg_stream
 
 logger = logging.getLogger(__name__)
 
+# Output dimensions for Meta placements
+PLACEMENT_SIZES = {
+    '1:1': (1080, 1080),
+    '4:5': (1080, 1350),
+    '9:16': (1080, 1920),
+    '16:9': (1920, 1080),
+}
+
+PLACEMENT_STRATEGIES = ("blur_bg", "crop", "pad")
+
+# Longest side of frames sent to the VL model; larger frames only cost more tokens
+KEYFRAME_MAX_DIMENSION = 768
+
+# Scene score (0-1) above which a frame starts a new shot
+SCENE_THRESHOLD = 0.3
+
+# Clip cutting modes: stream copy (snaps to keyframes) or smart cut (frame-exact)
+CUT_MODES = ("copy", "smart")
+
+def snap_to_keyframe(t: float, keyframes: List[float]) -> float:
+    """Latest keyframe at or before `t` (keyframes sorted); 0.0 if there is none"""
+    i = bisect.bisect_right(keyframes, t + 0.001)
+    return keyframes[i - 1] if i else 0.0
+
+
+def select_pieces(parts: List[Tuple[str, float, float]], start: float, end: float) -> List[str]:
+    """
+    Paths of the segment-muxer pieces making up [start, end), where `start` is
+    a keyframe the source was split on. `parts` are (path, start, end) rows
+    of the muxer's CSV segment list.
+    """
+    return [path for path, part_start, part_end in parts
+            if part_start >= start - 0.01 and part_start < end - 0.001]
+
+
 class VideoProcessor:
-    def __init__(self):
-        pass
+    def __init__(self, probe_cache: Optional[ProbeCache] = None, render_cache: Optional[RenderCache] = None):
+        self.probe_cache = probe_cache or default_probe_cache
+        self.render_cache = render_cache or default_render_cache
 
-    def get_video_info(self, input_path: str) -> Dict:
+    def probe(self, input_path: str) -> Dict:
+        """Full ffprobe result (streams + format), served from the probe cache"""
         try:
-            probe = ffmpeg.probe(input_path)
-            video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
-            if not video_stream:
-                raise Exception("No video stream found")
-            return {
-                'width': int(video_stream['width']),
-                'height': int(video_stream['height']),
-                'duration': float(video_stream['duration']),
-                'fps': eval(video_stream['r_frame_rate'])
-            }
+            return self.probe_cache.probe(input_path)
         except ffmpeg.Error as e:
             logger.error(f"FFmpeg probe error: {e.stderr.decode('utf8')}")
             raise e
 
+    def get_video_info(self, input_path: str) -> Dict:
+        probe = self.probe(input_path)
+        video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
+        if not video_stream:
+            raise Exception("No video stream found")
+        audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
+
+        # Some containers (mkv, webm) only report duration on the format
+        duration = video_stream.get('duration') or probe.get('format', {}).get('duration')
+        return {
+            'width': int(video_stream['width']),
+            'height': int(video_stream['height']),
+            'duration': float(duration or 0),
+            'fps': parse_rational(video_stream.get('r_frame_rate')),
+            'has_audio': audio_stream is not None,
+            'video_stream': video_stream,
+            'audio_stream': audio_stream,
+            'streams': probe['streams'],
+            'format': probe.get('format', {})
+        }
+
     def convert_to_format(self, 
                           input_path: str, 
                           output_path: str, 
                           target_aspect_ratio: str,
-                          strategy: str = "blur_bg") -> str:
+                          strategy: str = "blur_bg",
+                          threads: Optional[int] = None) -> str:
         """
         Convert video to target aspect ratio for Meta ads.
         
         Args:
             target_aspect_ratio: '1:1', '4:5', '9:16', '16:9'
             strategy: 'crop', 'blur_bg', 'pad'
+            threads: libx264 thread budget (None lets ffmpeg use every core)
         """
-        
-        info = self.get_video_info(input_path)
-        iw = info['width']
-        ih = info['height']
-        
-        # Calculate target dimensions
-        if target_aspect_ratio == '1:1':
-            target_w, target_h = 1080, 1080
-        elif target_aspect_ratio == '4:5':
-            target_w, target_h = 1080, 1350
-        elif target_aspect_ratio == '9:16':
-            target_w, target_h = 1080, 1920
-        elif target_aspect_ratio == '16:9':
-            target_w, target_h = 1920, 1080
-        else:
-            raise ValueError(f"Unsupported aspect ratio: {target_aspect_ratio}")
+        target_w, target_h = self._get_target_size(target_aspect_ratio)
+        build = self._convert_build(input_path, target_w, target_h, strategy, threads)
 
         try:
-            stream = ffmpeg.input(input_path)
+            self._run_cached('convert_to_format', [input_path], output_path, build)
+            return output_path
             
-            if strategy == "blur_bg":
-                # Create blurred background
-                # 1. Scale input to cover target size (maintain aspect ratio)
-                # 2. Blur it
-                # 3. Overlay original video scaled to fit inside
-                
-                # Background: Scale to cover
-                bg = stream.filter('scale', target_w, target_h, force_original_aspect_ratio='increase')
-                bg = bg.filter('crop', target_w, target_h)
-                bg = bg.filter('gblur', sigma=20)
-                
-                # Foreground: Scale to fit
-                fg = stream.filter('scale', target_w, target_h, force_original_aspect_ratio='decrease')
-                
-                # Overlay
-                out = ffmpeg.overlay(bg, fg, x='(W-w)/2', y='(H-h)/2')
-                
-            elif strategy == "crop":
-                # Crop to fill
-                out = stream.filter('scale', target_w, target_h, force_original_aspect_ratio='increase')
-                out = out.filter('crop', target_w, target_h)
-                
-            elif strategy == "pad":
-                # Pad with black bars
-                out = stream.filter('scale', target_w, target_h, force_original_aspect_ratio='decrease')
-                out = out.filter('pad', target_w, target_h, '(ow-iw)/2', '(oh-ih)/2')
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg conversion error: {e.stderr.decode('utf8')}")
+            raise e
+
+    def _convert_build(self, input_path: str, target_w: int, target_h: int, strategy: str, threads: Optional[int]) -> Callable:
+        """ffmpeg pipeline builder for one placement; also keys the cache entries of render_placements"""
+        def build(dest: str):
+            stream = ffmpeg.input(input_path)
             
-            else:
-                raise ValueError(f"Unknown strategy: {strategy}")
+            # The input node may feed several filters, no split needed here
+            out = self._build_placement_filter(stream, stream, target_w, target_h, strategy)
 
             # Audio mapping (copy audio)
             audio = stream.audio
             
-            # Run ffmpeg
-            pipeline = ffmpeg.output(out, audio, output_path, vcodec='libx264', acodec='aac', strict='experimental')
-            pipeline.run(overwrite_output=True, quiet=True)
-            
+            return ffmpeg.output(out, audio, dest, vcodec='libx264', acodec='aac', strict='experimental',
+                                 **self._thread_args(threads))
+
+        return build
+
+    def convert_to_format_chunked(self,
+                                  input_path: str,
+                                  output_path: str,
+                                  target_aspect_ratio: str,
+                                  strategy: str = "blur_bg",
+                                  chunks: int = 4,
+                                  max_workers: Optional[int] = None) -> str:
+        """
+        Segment-parallel variant of convert_to_format for long sources.
+        
+        The video stream is split on keyframes with a stream-copy segment pass,
+        chunks are encoded concurrently, then joined losslessly with the concat
+        demuxer. Audio is taken from the source and encoded once at the end.
+        
+        Args:
+            chunks: Number of segments to encode independently (1 = plain convert_to_format)
+            max_workers: Concurrent encoder processes (defaults to min(chunks, cpu_count))
+        """
+        if chunks <= 1:
+            return self.convert_to_format(input_path, output_path, target_aspect_ratio, strategy)
+
+        target_w, target_h = self._get_target_size(target_aspect_ratio)
+        if strategy not in PLACEMENT_STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        info = self.get_video_info(input_path)
+
+        cpu_count = os.cpu_count() or 1
+        workers = max(1, min(max_workers or chunks, chunks, cpu_count))
+        threads = max(1, cpu_count // workers)
+
+        work_dir = tempfile.mkdtemp(prefix="chunks_", dir=os.path.dirname(os.path.abspath(output_path)))
+        try:
+            # 1. Split the video stream; with stream copy the segment muxer cuts on the next keyframe
+            split_times = [info['duration'] * i / chunks for i in range(1, chunks)]
+            (
+                ffmpeg
+                .input(input_path)
+                .video
+                .output(os.path.join(work_dir, 'src_%04d.mkv'), c='copy', f='segment',
+                        segment_times=','.join(f"{t:.3f}" for t in split_times), reset_timestamps=1)
+                .run(overwrite_output=True, quiet=True)
+            )
+            sources = sorted(glob.glob(os.path.join(work_dir, 'src_*.mkv')))
+            logger.info(f"Split {input_path} into {len(sources)} chunks, encoding with {workers} workers")
+
+            # 2. Encode chunks concurrently (each job is its own ffmpeg process)
+            def encode_chunk(src: str) -> str:
+                dst = src.replace('src_', 'enc_')
+                chunk = ffmpeg.input(src)
+                out = self._build_placement_filter(chunk, chunk, target_w, target_h, strategy)
+                ffmpeg.output(out, dst, vcodec='libx264', **self._thread_args(threads)).run(overwrite_output=True, quiet=True)
+                return dst
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                encoded = list(pool.map(encode_chunk, sources))
+
+            # 3. Concat without re-encoding and attach the source audio once
+            list_path = os.path.join(work_dir, 'concat.txt')
+            with open(list_path, 'w') as f:
+                for path in encoded:
+                    f.write(f"file '{path}'\n")
+
+            video = ffmpeg.input(list_path, f='concat', safe=0).video
+            streams = [video]
+            if info['has_audio']:
+                streams.append(ffmpeg.input(input_path).audio)
+            ffmpeg.output(*streams, output_path, vcodec='copy', acodec='aac').run(overwrite_output=True, quiet=True)
+
             return output_path
-            
+
         except ffmpeg.Error as e:
-            logger.error(f"FFmpeg conversion error: {e.stderr.decode('utf8')}")
+            logger.error(f"FFmpeg chunked conversion error: {e.stderr.decode('utf8')}")
             raise e
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def render_placements(self, input_path: str, placements: List[Dict], threads: Optional[int] = None) -> List[str]:
+        """
+        Render several placements of the same source in a single ffmpeg process.
+        The source is decoded once and fanned out with a `split` filter.
+        
+        Args:
+            placements: List of dicts, e.g.
+                [
+                    {"ratio": "1:1", "strategy": "crop", "output_path": "/app/data/output/a_1x1.mp4"},
+                    {"ratio": "9:16", "strategy": "blur_bg", "output_path": "/app/data/output/a_9x16.mp4"}
+                ]
+            threads: libx264 thread budget per output (None lets ffmpeg use every core)
+        Returns:
+            List of output paths, in the same order as `placements`
+        
+        Each output is cached like the equivalent convert_to_format call, so
+        only placements without a cache hit are rendered.
+        """
+        if not placements:
+            return []
+
+        sizes = [self._get_target_size(p['ratio']) for p in placements]
+        strategies = [p.get('strategy', 'blur_bg') for p in placements]
+        for strategy in strategies:
+            if strategy not in PLACEMENT_STRATEGIES:
+                raise ValueError(f"Unknown strategy: {strategy}")
+
+        keys = {}
+        pending = list(range(len(placements)))
+        if self.render_cache.enabled:
+            pending = []
+            for i, placement in enumerate(placements):
+                build = self._convert_build(input_path, *sizes[i], strategies[i], threads)
+                key = self._cache_key('convert_to_format', [input_path], placement['output_path'], build)
+                if self.render_cache.fetch(key, placement['output_path']):
+                    logger.info(f"Render cache hit for convert_to_format -> {placement['output_path']}")
+                else:
+                    keys[i] = key
+                    pending.append(i)
+
+        if not pending:
+            return [p['output_path'] for p in placements]
+
+        try:
+            stream = ffmpeg.input(input_path)
+
+            # blur_bg consumes the source twice (background + foreground)
+            branch_count = sum(2 if strategies[i] == "blur_bg" else 1 for i in pending)
+            split = stream.video.filter_multi_output('split', branch_count)
+
+            outputs = []
+            branch = 0
+            for i in pending:
+                (target_w, target_h), strategy = sizes[i], strategies[i]
+                if strategy == "blur_bg":
+                    bg_src, fg_src = split.stream(branch), split.stream(branch + 1)
+                    branch += 2
+                else:
+                    bg_src = fg_src = split.stream(branch)
+                    branch += 1
+
+                out = self._build_placement_filter(bg_src, fg_src, target_w, target_h, strategy)
+                outputs.append(
+                    ffmpeg.output(out, stream.audio, placements[i]['output_path'],
+                                  vcodec='libx264', acodec='aac', strict='experimental',
+                                  **self._thread_args(threads))
+                )
+
+            ffmpeg.merge_outputs(*outputs).run(overwrite_output=True, quiet=True)
+
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg multi-placement error: {e.stderr.decode('utf8')}")
+            raise e
+
+        for i, key in keys.items():
+            self._store_rendered(key, placements[i]['output_path'])
+        return [p['output_path'] for p in placements]
+
+    def _run_cached(self, operation: str, input_paths: List[str], output_path: str, build: Callable) -> None:
+        """
+        Run the ffmpeg pipeline returned by `build(dest)` through the render cache.
+        The cache key covers the input content and the ffmpeg arguments with file
+        paths and thread counts normalized away, so identical renders are reused.
+        """
+        cache = self.render_cache
+        if not cache.enabled:
+            build(output_path).run(overwrite_output=True, quiet=True)
+            return
+
+        key = self._cache_key(operation, input_paths, output_path, build)
+        if cache.fetch(key, output_path):
+            logger.info(f"Render cache hit for {operation} -> {output_path}")
+            return
+
+        try:
+            tmp_path = cache.temp_path(os.path.splitext(output_path)[1])
+        except OSError as e:
+            logger.warning(f"Render cache unavailable, rendering directly: {e}")
+            build(output_path).run(overwrite_output=True, quiet=True)
+            return
+
+        try:
+            build(tmp_path).run(overwrite_output=True, quiet=True)
+            cache.store(key, tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _cache_key(self, operation: str, input_paths: List[str], output_path: str, build: Callable) -> str:
+        """Render cache key for `build`, with file paths and thread counts normalized away"""
+        args = build(output_path).get_args()
+        replacements = {path: f"<input{i}>" for i, path in enumerate(input_paths)}
+        replacements[output_path] = "<output>"
+        normalized = []
+        skip_next = False
+        for arg in args:
+            if skip_next:
+                skip_next = False
+                continue
+            if arg == '-threads':
+                # Thread count doesn't change the rendered content
+                skip_next = True
+                continue
+            normalized.append(replacements.get(arg, arg))
+        return self.render_cache.make_key(operation, input_paths, normalized)
+
+    def _store_rendered(self, key: str, output_path: str) -> None:
+        """Add an output rendered in place to the cache; a failure only costs a future re-render"""
+        try:
+            self.render_cache.store_copy(key, output_path)
+        except OSError as e:
+            logger.warning(f"Render cache unavailable, not storing {output_path}: {e}")
+
+    def _thread_args(self, threads: Optional[int]) -> Dict:
+        """Output kwargs capping encoder threads, so parallel jobs don't oversubscribe the CPU"""
+        return {'threads': threads} if threads else {}
+
+    def _get_target_size(self, target_aspect_ratio: str) -> Tuple[int, int]:
+        """Resolve a Meta placement ratio to output dimensions"""
+        if target_aspect_ratio not in PLACEMENT_SIZES:
+            raise ValueError(f"Unsupported aspect ratio: {target_aspect_ratio}")
+        return PLACEMENT_SIZES[target_aspect_ratio]
+
+    def _build_placement_filter(self, bg_src, fg_src, target_w: int, target_h: int, strategy: str):
+        """
+        Build the video filter chain for one placement.
+        `bg_src` and `fg_src` are only distinct for blur_bg, which reads the source twice.
+        """
+        if strategy == "blur_bg":
+            # Create blurred background
+            # 1. Scale input to cover target size (maintain aspect ratio)
+            # 2. Blur it
+            # 3. Overlay original video scaled to fit inside
+            
+            # Background: Scale to cover
+            bg = bg_src.filter('scale', target_w, target_h, force_original_aspect_ratio='increase')
+            bg = bg.filter('crop', target_w, target_h)
+            bg = bg.filter('gblur', sigma=20)
+            
+            # Foreground: Scale to fit
+            fg = fg_src.filter('scale', target_w, target_h, force_original_aspect_ratio='decrease')
+            
+            # Overlay
+            return ffmpeg.overlay(bg, fg, x='(W-w)/2', y='(H-h)/2')
+            
+        elif strategy == "crop":
+            # Crop to fill
+            out = fg_src.filter('scale', target_w, target_h, force_original_aspect_ratio='increase')
+            return out.filter('crop', target_w, target_h)
+            
+        elif strategy == "pad":
+            # Pad with black bars
+            out = fg_src.filter('scale', target_w, target_h, force_original_aspect_ratio='decrease')
+            return out.filter('pad', target_w, target_h, '(ow-iw)/2', '(oh-ih)/2')
+        
+        raise ValueError(f"Unknown strategy: {strategy}")
 
     def extract_highlight_frame(self, input_path: str, time_sec: float, output_path: str):
         """Extract a single frame as image"""
@@ -113,32 +391,346 @@ class VideoProcessor:
              logger.error(f"FFmpeg frame extract error: {e.stderr.decode('utf8')}")
              raise e
 
+    def extract_keyframes(self,
+                          input_path: str,
+                          num_frames: int = 5,
+                          timestamps: Optional[List[float]] = None,
+                          max_dimension: int = KEYFRAME_MAX_DIMENSION) -> List[bytes]:
+        """
+        Extract frames in memory as JPEG bytes, in a single ffmpeg pass.
+        
+        A `select` filter picks the frames, they are downscaled to fit within
+        `max_dimension` (never upscaled) and streamed over an MJPEG pipe, so no
+        temp files are written.
+        
+        Args:
+            num_frames: Frames spread evenly over the video (ignored if `timestamps` is given)
+            timestamps: Explicit times in seconds to sample
+        Returns:
+            One JPEG per timestamp, in order. Times that land on the same frame
+            share one bytes object; times past the last decoded frame are dropped.
+        """
+        info = self.get_video_info(input_path)
+        fps = info['fps'] or 25.0
+        duration = info['duration']
+        total_frames = int(info['video_stream'].get('nb_frames') or 0) or max(1, int(duration * fps))
+
+        if timestamps is None:
+            # Centre of each equal slice, so the first and last frames (often black) are avoided
+            timestamps = [duration * (i + 0.5) / num_frames for i in range(num_frames)]
+        # Frame index from time; exact for CFR, close enough for VFR sources
+        indices = [min(total_frames - 1, max(0, int(round(t * fps)))) for t in timestamps]
+        unique = sorted(set(indices))
+        if not unique:
+            return []
+
+        select_expr = '+'.join(f"eq(n,{n})" for n in unique)
+        try:
+            data, _ = (
+                ffmpeg
+                .input(input_path)
+                .video
+                .filter('select', select_expr)
+                .filter('scale', f"min({max_dimension},iw)", f"min({max_dimension},ih)",
+                        force_original_aspect_ratio='decrease')
+                .output('pipe:', format='image2pipe', vcodec='mjpeg', vsync='vfr', **{'q:v': 3})
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg keyframe extract error: {e.stderr.decode('utf8')}")
+            raise e
+
+        frames = dict(zip(unique, split_jpeg_stream(data)))
+        return [frames[n] for n in indices if n in frames]
+
+    def detect_scenes(self,
+                      input_path: str,
+                      threshold: float = SCENE_THRESHOLD,
+                      analysis_width: int = 320,
+                      min_shot_sec: float = 0.5) -> List[Dict]:
+        """
+        Detect shot boundaries with ffmpeg's scene score.
+        Frames are downscaled before scoring, which is far cheaper than full
+        resolution and just as good at spotting cuts.
+        
+        Returns:
+            Chronological list of shots covering the whole video, e.g.
+            [{"start": 0.0, "end": 3.2}, {"start": 3.2, "end": 9.8}]
+        """
+        duration = self.get_video_info(input_path)['duration']
+        try:
+            _, stderr = (
+                ffmpeg
+                .input(input_path)
+                .video
+                .filter('scale', analysis_width, -2)
+                .filter('select', f"gt(scene,{threshold})")
+                .filter('showinfo')
+                .output('-', format='null')
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg scene detection error: {e.stderr.decode('utf8')}")
+            raise e
+
+        cuts = []
+        for line in stderr.decode('utf8', errors='replace').splitlines():
+            if 'showinfo' not in line:
+                continue
+            match = re.search(r'pts_time:\s*([\d.]+)', line)
+            if match:
+                cuts.append(float(match.group(1)))
+
+        # Some containers report no duration; the last shot then ends at the last cut
+        end_time = duration if duration > 0 else max(cuts, default=0.0)
+        shots = []
+        start = 0.0
+        for cut in sorted(c for c in cuts if c < end_time) + [end_time]:
+            if cut - start < min_shot_sec and cut < end_time:
+                # Flash frames and fades produce bursts of cuts; fold them into the current shot
+                continue
+            if cut - start < min_shot_sec and shots:
+                shots[-1]['end'] = round(cut, 3)
+            else:
+                shots.append({"start": round(start, 3), "end": round(cut, 3)})
+            start = cut
+
+        logger.info(f"Detected {len(shots)} shots in {input_path}")
+        return shots
+
     def cut_video(self, input_path: str, start: float, end: float, output_path: str):
         """Cut video segment"""
-        try:
-            (
+        def build(dest: str):
+            return (
                 ffmpeg
                 .input(input_path, ss=start, t=end-start)
-                .output(output_path, c='copy')
-                .run(overwrite_output=True, quiet=True)
+                .output(dest, c='copy')
             )
+
+        try:
+            self._run_cached('cut_video', [input_path], output_path, build)
         except ffmpeg.Error as e:
              logger.error(f"FFmpeg cut error: {e.stderr.decode('utf8')}")
              raise e
 
+    def list_keyframes(self, input_path: str) -> List[float]:
+        """
+        Keyframe times of the first video stream, in seconds from the start of
+        the file (the same timeline as -ss). Read from packet flags, no decoding.
+        """
+        try:
+            data = ffmpeg.probe(input_path, select_streams='v:0', show_entries='packet=pts_time,flags')
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg keyframe probe error: {e.stderr.decode('utf8')}")
+            raise e
+
+        offset = float(data.get('format', {}).get('start_time') or 0)
+        keyframes = []
+        for packet in data.get('packets', []):
+            pts_time = packet.get('pts_time')
+            if 'K' in packet.get('flags', '') and pts_time not in (None, 'N/A'):
+                keyframes.append(float(pts_time) - offset)
+        return sorted(keyframes)
+
+    def cut_segments(self, input_path: str, segments: List[Dict], mode: str = "copy", threads: Optional[int] = None) -> List[str]:
+        """
+        Cut several segments of one source.
+        
+        Args:
+            segments: List of dicts, e.g. [{"start": 3.0, "end": 9.5, "output_path": "/app/data/output/a_01.mp4"}]
+            mode: "copy" - one stream-copy demux pass for all segments; each clip
+                  starts at the keyframe at or before its start and ends at the
+                  first keyframe at or after its end (up to one GOP extra per side).
+                  "smart" - frame-exact: only the partial GOPs at each cut are
+                  re-encoded, the rest is stream-copied (h264 sources; others are
+                  re-encoded in full).
+            threads: libx264 thread budget for re-encoded parts
+        Returns:
+            List of output paths, in the same order as `segments`
+        """
+        if mode not in CUT_MODES:
+            raise ValueError(f"Unknown cut mode: {mode}")
+        if not segments:
+            return []
+
+        # Each clip is cached on its own, so re-cutting a video only renders new segments
+        keys = {}
+        pending = segments
+        if self.render_cache.enabled:
+            pending = []
+            for seg in segments:
+                args = [f"{seg['start']:.3f}", f"{seg['end']:.3f}", os.path.splitext(seg['output_path'])[1]]
+                key = self.render_cache.make_key(f"cut_segments_{mode}", [input_path], args)
+                if self.render_cache.fetch(key, seg['output_path']):
+                    logger.info(f"Render cache hit for cut_segments -> {seg['output_path']}")
+                else:
+                    keys[seg['output_path']] = key
+                    pending.append(seg)
+
+        if pending:
+            if mode == "copy":
+                self._cut_segments_copy(input_path, pending)
+            else:
+                for seg in pending:
+                    self.smart_cut(input_path, seg['start'], seg['end'], seg['output_path'], threads)
+            for output_path, key in keys.items():
+                self._store_rendered(key, output_path)
+        return [seg['output_path'] for seg in segments]
+
+    def _cut_segments_copy(self, input_path: str, segments: List[Dict]) -> List[str]:
+        """
+        Split the source once with the segment muxer, then assemble each clip
+        from the pieces between its start and end.
+
+        The muxer splits at the first keyframe at or after each requested time,
+        so starts are snapped back to their keyframe first; otherwise the piece
+        holding a start would begin at the previous boundary, far too early.
+        """
+        duration = self.get_video_info(input_path)['duration']
+        ext = os.path.splitext(input_path)[1] or '.mp4'
+        keyframes = self.list_keyframes(input_path)
+        # Rounded down, so the muxer's "first keyframe at or after" is the keyframe itself
+        starts = [math.floor(snap_to_keyframe(seg['start'], keyframes) * 1000) / 1000 for seg in segments]
+        times = starts + [round(seg['end'], 3) for seg in segments]
+        boundaries = sorted({t for t in times if 0 < t < duration})
+
+        work_dir = tempfile.mkdtemp(prefix="cuts_", dir=os.path.dirname(os.path.abspath(segments[0]['output_path'])))
+        try:
+            list_path = os.path.join(work_dir, 'parts.csv')
+            split_kwargs = dict(c='copy', f='segment', segment_list=list_path,
+                                segment_list_type='csv', reset_timestamps=1)
+            if boundaries:
+                split_kwargs['segment_times'] = ','.join(f"{t:.3f}" for t in boundaries)
+            (
+                ffmpeg
+                .input(input_path)
+                .output(os.path.join(work_dir, f'part_%04d{ext}'), **split_kwargs)
+                .run(overwrite_output=True, quiet=True)
+            )
+
+            # "part_0003.mp4,12.012000,16.016000": actual (keyframe-aligned) piece times
+            parts = []
+            with open(list_path) as f:
+                for line in f:
+                    name, part_start, part_end = line.strip().rsplit(',', 2)
+                    parts.append((os.path.join(work_dir, name), float(part_start), float(part_end)))
+
+            outputs = []
+            for seg, start in zip(segments, starts):
+                pieces = select_pieces(parts, start, seg['end'])
+                if not pieces:
+                    raise ValueError(f"Segment {seg['start']}-{seg['end']} is outside {input_path}")
+                if len(pieces) == 1:
+                    # Pieces can be shared by overlapping segments, so copy rather than move
+                    shutil.copyfile(pieces[0], seg['output_path'])
+                else:
+                    self._concat_copy(pieces, seg['output_path'], work_dir)
+                outputs.append(seg['output_path'])
+
+            logger.info(f"Cut {len(segments)} segments from {input_path} in one pass ({len(parts)} pieces)")
+            return outputs
+
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg segment cut error: {e.stderr.decode('utf8')}")
+            raise e
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def smart_cut(self, input_path: str, start: float, end: float, output_path: str, threads: Optional[int] = None) -> str:
+        """
+        Frame-exact cut that re-encodes only the partial GOPs at the edges.
+        
+        [start, first keyframe) and [last keyframe, end) are re-encoded with
+        libx264 matching the source pixel format; the keyframe-aligned middle
+        is stream-copied. The video parts are joined with the concat demuxer
+        and the audio for [start, end) is encoded once on top.
+        """
+        info = self.get_video_info(input_path)
+        video_stream = info['video_stream']
+        keyframes = self.list_keyframes(input_path) if video_stream.get('codec_name') == 'h264' else []
+        first_key = next((k for k in keyframes if k >= start - 0.001), None)
+        last_key = next((k for k in reversed(keyframes) if k <= end + 0.001), None)
+
+        encode_kwargs = dict(vcodec='libx264', pix_fmt=video_stream.get('pix_fmt') or 'yuv420p',
+                             preset='veryfast', crf=18, **self._thread_args(threads))
+        try:
+            if first_key is None or last_key is None or last_key - first_key < 0.5:
+                # Nothing worth copying (short clip, or a codec we can't splice): re-encode it all
+                (
+                    ffmpeg
+                    .input(input_path, ss=start, t=end - start)
+                    .output(output_path, acodec='aac', **encode_kwargs)
+                    .run(overwrite_output=True, quiet=True)
+                )
+                return output_path
+
+            work_dir = tempfile.mkdtemp(prefix="smartcut_", dir=os.path.dirname(os.path.abspath(output_path)))
+            try:
+                # MPEG-TS parts carry parameter sets in-band, so re-encoded and copied GOPs concat cleanly
+                parts = []
+                if first_key - start > 0.01:
+                    head = os.path.join(work_dir, 'head.ts')
+                    ffmpeg.input(input_path, ss=start, t=first_key - start).video.output(
+                        head, f='mpegts', **encode_kwargs).run(overwrite_output=True, quiet=True)
+                    parts.append(head)
+
+                # The segment muxer splits exactly on keyframe packets, so the middle is
+                # [first_key, last_key) with no frame shared with the tail. A -t cut on a
+                # stream copy ends on packet order and pulls in last_key with B-frames.
+                # Times are rounded down so "first keyframe at or after" is the keyframe itself.
+                split_times = [math.floor(k * 1000) / 1000 for k in (first_key, last_key) if k > 0.001]
+                ffmpeg.input(input_path, to=end + 1.0).video.output(
+                    os.path.join(work_dir, 'gop_%03d.ts'), c='copy', f='segment', segment_format='mpegts',
+                    segment_times=','.join(f"{t:.3f}" for t in split_times), reset_timestamps=1
+                ).run(overwrite_output=True, quiet=True)
+                parts.append(os.path.join(work_dir, f'gop_{len(split_times) - 1:03d}.ts'))
+
+                if end - last_key > 0.01:
+                    tail = os.path.join(work_dir, 'tail.ts')
+                    ffmpeg.input(input_path, ss=last_key, t=end - last_key).video.output(
+                        tail, f='mpegts', **encode_kwargs).run(overwrite_output=True, quiet=True)
+                    parts.append(tail)
+
+                list_path = os.path.join(work_dir, 'concat.txt')
+                with open(list_path, 'w') as f:
+                    for path in parts:
+                        f.write(f"file '{path}'\n")
+
+                streams = [ffmpeg.input(list_path, f='concat', safe=0).video]
+                if info['has_audio']:
+                    streams.append(ffmpeg.input(input_path, ss=start, t=end - start).audio)
+                ffmpeg.output(*streams, output_path, vcodec='copy', acodec='aac').run(overwrite_output=True, quiet=True)
+                return output_path
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg smart cut error: {e.stderr.decode('utf8')}")
+            raise e
+
+    def _concat_copy(self, paths: List[str], output_path: str, work_dir: str) -> None:
+        """Join pieces of the same stream without re-encoding"""
+        list_path = os.path.join(work_dir, f"concat_{os.path.basename(output_path)}.txt")
+        with open(list_path, 'w') as f:
+            for path in paths:
+                f.write(f"file '{path}'\n")
+        ffmpeg.input(list_path, f='concat', safe=0).output(output_path, c='copy').run(overwrite_output=True, quiet=True)
+
     def remove_watermark(self, input_path: str, output_path: str, x: int, y: int, w: int, h: int):
         """
         Remove watermark using delogo filter.
         Requires specifying the bounding box of the watermark.
         """
-        try:
-            (
+        def build(dest: str):
+            return (
                 ffmpeg
                 .input(input_path)
                 .filter('delogo', x=x, y=y, w=w, h=h)
-                .output(output_path, c='a', vcodec='libx264', crf=23)
-                .run(overwrite_output=True, quiet=True)
+                .output(dest, c='a', vcodec='libx264', crf=23)
             )
+
+        try:
+            self._run_cached('remove_watermark', [input_path], output_path, build)
         except ffmpeg.Error as e:
              logger.error(f"FFmpeg delogo error: {e.stderr.decode('utf8')}")
              raise e
@@ -147,23 +739,24 @@ class VideoProcessor:
         """
         Remove or replace audio.
         """
-        try:
+        def build(dest: str):
             inp = ffmpeg.input(input_path)
             
             if remove and not new_audio_path:
                 # Remove audio (video only)
-                pipeline = inp.output(output_path, vcodec='copy', an=None)
+                return inp.output(dest, vcodec='copy', an=None)
             elif new_audio_path:
                 # Replace audio
                 audio_inp = ffmpeg.input(new_audio_path)
                 # Shortest=True ensures video doesn't extend if audio is longer, or vice versa
-                pipeline = ffmpeg.output(inp.video, audio_inp.audio, output_path, vcodec='copy', acodec='aac', shortest=None)
+                return ffmpeg.output(inp.video, audio_inp.audio, dest, vcodec='copy', acodec='aac', shortest=None)
             else:
                 # No-op (copy)
-                pipeline = inp.output(output_path, c='copy')
+                return inp.output(dest, c='copy')
 
-            pipeline.run(overwrite_output=True, quiet=True)
-            
+        inputs = [input_path, new_audio_path] if new_audio_path else [input_path]
+        try:
+            self._run_cached('process_audio', inputs, output_path, build)
         except ffmpeg.Error as e:
              logger.error(f"FFmpeg audio processing error: {e.stderr.decode('utf8')}")
              raise e
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Coroutine, Optional
+
+from backend.services.ai_service import AIService, AIProviderConfig
+from backend.services.config_service import ConfigService, SettingsModel
+from backend.services.video_processor import VideoProcessor
+from backend.pipeline.step1_outline import Step1ContentAnalysis
+from backend.pipeline.step3_scoring import Step3Scoring
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Services and pipeline steps shared by every task in a worker process.
+
+    Built from one settings version; tasks borrow it through get_container(),
+    which swaps in a fresh container when the settings change. The AI
+    service's HTTP pool and response cache live on the persistent loop of
+    loop_runner, so they survive across tasks too.
+    """
+
+    def __init__(self, settings: SettingsModel, version: str):
+        self.settings = settings
+        self.version = version
+        self.ai = AIService(AIProviderConfig(
+            provider_name=settings.vendor,
+            api_base=settings.api_base,
+            api_key=settings.api_key,
+            model_name=settings.vl_model,
+            max_concurrency=settings.ai_max_concurrency,
+            rpm_limit=settings.ai_rpm_limit,
+            tpm_limit=settings.ai_tpm_limit
+        ))
+        self.vp = VideoProcessor()
+        self.step1 = Step1ContentAnalysis(self.ai, self.vp)
+        self.step3 = Step3Scoring(self.ai)
+        self._step5 = None
+
+    @property
+    def step5(self):
+        # Imported lazily: only clip generation needs it
+        if self._step5 is None:
+            from backend.pipeline.step5_video import Step5VideoGeneration
+            self._step5 = Step5VideoGeneration(self.vp)
+        return self._step5
+
+
+_container: Optional[ServiceContainer] = None
+_container_lock = threading.Lock()
+
+
+def get_container() -> ServiceContainer:
+    """The process-wide container for the current settings version (built on first use)"""
+    global _container
+    version = ConfigService.get_version()
+    container = _container
+    if container is not None and container.version == version:
+        return container
+    with _container_lock:
+        if _container is None or _container.version != version:
+            _container = ServiceContainer(ConfigService.load_settings(), version)
+            logger.info(f"Built service container for settings version {version}")
+        return _container
+
+
+class LoopRunner:
+    """
+    One long-lived event loop on a daemon thread, for running coroutines from
+    synchronous Prefect tasks. Unlike asyncio.run per task, connections and
+    other loop-bound resources are kept between calls, and tasks running on
+    different threads share the loop (and its concurrency limits).
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result(timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop, self._thread = None, None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            return loop
+        with self._lock:
+            if self._loop is None or not self._loop.is_running():
+                loop = asyncio.new_event_loop()
+                started = threading.Event()
+                loop.call_soon(started.set)
+                self._thread = threading.Thread(target=loop.run_forever, name="worker-event-loop", daemon=True)
+                self._thread.start()
+                started.wait()
+                self._loop = loop
+            return self._loop
+
+
+loop_runner = LoopRunner()
+
+
+def run_async(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the worker's persistent loop and wait for the result"""
+    return loop_runner.run(coro, timeout)
+
+
+@contextmanager
+def borrow_services(task_name: str, log=None):
+    """
+    Hand a task the shared container, logging how long acquiring it took
+    (the per-task overhead) next to the total task time.
+    """
+    log = log or logger
+    started = time.perf_counter()
+    container = get_container()
+    overhead_ms = (time.perf_counter() - started) * 1000
+    try:
+        yield container
+    finally:
+        total_ms = (time.perf_counter() - started) * 1000
+        log.info(f"{task_name}: setup overhead {overhead_ms:.1f} ms, total {total_ms:.1f} ms")
@@ -1,21 +1,34 @@
 from prefect import flow, task, get_run_logger
+from prefect.task_runners import ThreadPoolTaskRunner
 from backend.services.downloader import VideoDownloader
 from backend.schemas.task import DownloadRequest
 from typing import Dict, Any, List
+from itertools import zip_longest
 import os
 
 from backend.services.config_service import ConfigService
+from backend.services.archive_filter import archive_membership
+from backend.services.archive_service import ArchiveService
+from backend.services.batch_service import BatchService
+from backend.services.download_throttle import (
+    DOWNLOAD_MAX_CONCURRENCY,
+    DOWNLOAD_PER_PLATFORM_CONCURRENCY,
+    DOWNLOAD_MIN_INTERVAL,
+    get_throttle,
+    release_throttle,
+)
 
-@task(name="download_video_task", retries=3, retry_delay_seconds=10)
-def download_video_task(request: DownloadRequest) -> List[Dict]:
-    logger = get_run_logger()
-    logger.info(f"Starting download for URL: {request.url}")
-    
+# Upper bound on download threads per batch flow run
+BATCH_MAX_WORKERS = 16
+
+def _run_download(request: DownloadRequest, logger) -> List[Dict]:
+    """Download one URL and record what was fetched in the archive"""
     settings = ConfigService.load_settings()
     
     downloader = VideoDownloader(
         cookies_path=request.cookies_path,
-        proxy=settings.proxy_url
+        proxy=settings.proxy_url,
+        skip_video=archive_membership.is_known
     )
     
     # Progress hook to log progress
@@ -29,18 +42,95 @@ def download_video_task(request: DownloadRequest) -> List[Dict]:
         elif d['status'] == 'finished':
             logger.info("Download finished, post-processing...")
 
+    results = downloader.download(
+        url=request.url,
+        options=request.options,
+        progress_hook=progress_hook
+    )
+    logger.info(f"Successfully downloaded {len(results)} videos")
+    
+    # Record downloads so later runs (and the membership filter) skip them
+    for r in results:
+        if r.get('id') and r.get('filepath'):
+            try:
+                ArchiveService.add_entry(r['id'], platform=r['platform'], title=r.get('title'), uploader=r.get('uploader'))
+            except Exception as e:
+                logger.warning(f"Failed to record {r['id']} in archive: {e}")
+    return results
+
+@task(name="download_video_task", retries=3, retry_delay_seconds=10)
+def download_video_task(request: DownloadRequest) -> List[Dict]:
+    logger = get_run_logger()
+    logger.info(f"Starting download for URL: {request.url}")
+    
     try:
-        results = downloader.download(
-            url=request.url,
-            options=request.options,
-            progress_hook=progress_hook
-        )
-        logger.info(f"Successfully downloaded {len(results)} videos")
-        return results
+        return _run_download(request, logger)
     except Exception as e:
         logger.error(f"Download failed: {str(e)}")
         raise e
 
+@task(name="download_batch_item_task")
+def download_batch_item_task(batch_id: str, item: Dict) -> str:
+    """
+    Download one link of a batch under the batch's throttle. Failures are
+    recorded on the item instead of raised, so one bad link doesn't fail the run.
+    """
+    logger = get_run_logger()
+    throttle = get_throttle(batch_id)
+    
+    with throttle.slot(item["platform"]):
+        BatchService.mark_running(item["id"])
+        logger.info(f"[{item['platform']}] Starting download for URL: {item['url']}")
+        try:
+            results = _run_download(DownloadRequest(url=item["url"], is_batch=True), logger)
+        except Exception as e:
+            logger.error(f"Download failed for {item['url']}: {str(e)}")
+            BatchService.mark_finished(item["id"], "failed", error=str(e)[:2000])
+            return "failed"
+    
+    BatchService.mark_finished(item["id"], "done", result_count=len(results))
+    return "done"
+
+def _interleave_by_platform(items: List[Dict]) -> List[Dict]:
+    """Round-robin across platforms so queued work for one host doesn't starve the others"""
+    by_platform: Dict[str, List[Dict]] = {}
+    for item in items:
+        by_platform.setdefault(item["platform"], []).append(item)
+    return [item for group in zip_longest(*by_platform.values()) for item in group if item]
+
+@flow(name="batch_download_flow", task_runner=ThreadPoolTaskRunner(max_workers=BATCH_MAX_WORKERS))
+def batch_download_flow(batch_id: str,
+                        max_concurrency: int = DOWNLOAD_MAX_CONCURRENCY,
+                        per_platform_concurrency: int = DOWNLOAD_PER_PLATFORM_CONCURRENCY,
+                        min_interval: float = DOWNLOAD_MIN_INTERVAL):
+    """
+    Download every link claimed by a batch (see BatchService.start_batch)
+    in one flow run, with at most `max_concurrency` downloads in flight,
+    `per_platform_concurrency` per platform, and `min_interval` seconds
+    between starts on the same platform.
+    """
+    logger = get_run_logger()
+    items = BatchService.get_pending_items(batch_id)
+    logger.info(f"Batch {batch_id}: {len(items)} links to download")
+    
+    archive_membership.rebuild()
+    get_throttle(
+        batch_id,
+        max_concurrency=min(max_concurrency, BATCH_MAX_WORKERS),
+        per_platform=per_platform_concurrency,
+        min_interval=min_interval
+    )
+    try:
+        futures = [download_batch_item_task.submit(batch_id, item) for item in _interleave_by_platform(items)]
+        for future in futures:
+            future.wait()
+    finally:
+        release_throttle(batch_id)
+    
+    status = BatchService.get_batch_status(batch_id)
+    logger.info(f"Batch {batch_id} finished: {status['statuses']}")
+    return status
+
 @flow(name="video_download_flow")
 def video_download_flow(request_dict: Dict):
     # Convert dict back to model if needed or pass fields
@@ -49,6 +139,9 @@ def video_download_flow(request_dict: Dict):
     # Normally we might save task state to DB here
     
     request = DownloadRequest(**request_dict)
+    
+    # Each flow run is a fresh process: load the filter once, up front
+    archive_membership.rebuild()
     results = download_video_task(request)
     
     return results
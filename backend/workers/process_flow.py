@@ -1,57 +1,100 @@
 from prefect import flow, task, get_run_logger
+from prefect.futures import as_completed
+from prefect.task_runners import ThreadPoolTaskRunner
 from backend.schemas.task import ProcessingTask
-from backend.services.ai_service import AIService, AIProviderConfig
-from backend.services.video_processor import VideoProcessor
-from backend.pipeline.step1_outline import Step1ContentAnalysis
-from backend.pipeline.step3_scoring import Step3Scoring
-from backend.pipeline.step5_video import Step5VideoGeneration
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import concurrent.futures
+import multiprocessing
 import asyncio
+import hashlib
+import json
+import time
 import os
 
-from backend.services.config_service import ConfigService
+from backend.services.checkpoint_service import CheckpointService, resolve_stage
+from backend.services.config_service import ConfigService, SettingsModel
+from backend.services.render_cache import content_fingerprint
+from backend.workers.container import borrow_services, run_async
+
+# Default threads for AI-bound tasks in process_batch_flow; matches the default
+# ai_max_concurrency setting, which caps in-flight requests anyway. Use
+# batch_flow_for_settings() to size the pool from the current settings.
+PROCESS_AI_WORKERS = SettingsModel().ai_max_concurrency
+# Minimum score for a segment to be cut into a clip
+CLIP_MIN_SCORE = 8
 
 
 @task
 def analyze_content(video_path: str, ad_goal: str = None):
-    settings = ConfigService.load_settings()
-    config = AIProviderConfig(
-        provider_name=settings.vendor,
-        api_base=settings.api_base,
-        api_key=settings.api_key,
-        model_name=settings.vl_model
-    )
-    ai = AIService(config)
-    vp = VideoProcessor()
-    step1 = Step1ContentAnalysis(ai, vp)
-    return asyncio.run(step1.run(video_path, ad_goal=ad_goal))
+    with borrow_services("analyze_content", get_run_logger()) as services:
+        return run_async(services.step1.run(video_path, ad_goal=ad_goal))
 
 @task
 def score_segments(timeline_mock: List[Dict]):
-    settings = ConfigService.load_settings()
-    config = AIProviderConfig(
-        provider_name=settings.vendor,
-        api_base=settings.api_base,
-        api_key=settings.api_key,
-        model_name=settings.vl_model
-    )
-    ai = AIService(config)
-    step3 = Step3Scoring(ai)
-    return asyncio.run(step3.run(timeline_mock))
+    with borrow_services("score_segments", get_run_logger()) as services:
+        return run_async(services.step3.run(timeline_mock))
 
 @task
 def generate_clips(video_path: str, segments: List[Dict], output_dir: str):
-    vp = VideoProcessor()
-    step5 = Step5VideoGeneration(vp)
-    return asyncio.run(step5.run(video_path, segments, output_dir))
+    with borrow_services("generate_clips", get_run_logger()) as services:
+        return run_async(services.step5.run(video_path, segments, output_dir))
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _clips_exist(clips: List) -> bool:
+    paths = [c if isinstance(c, str) else c.get("output_path") for c in clips or []]
+    return all(p and os.path.exists(p) for p in paths)
+
+def _analysis_complete(result: Dict) -> bool:
+    # Step 1 turns AI errors into a "rejected"/fallback result; those must not stick
+    return not result.get("failed")
+
+def _scores_complete(segments: List[Dict]) -> bool:
+    return not any(s.get("score_fallback") for s in segments)
+
+def _run_stage(stage: str, video_path: str, fingerprint: str, params: Dict, compute, logger, valid=None):
+    """
+    Return the checkpointed output of `stage`, or compute, checkpoint and return it.
+    Outputs failing `valid` are neither reused nor checkpointed, so a transient
+    failure is retried on the next run instead of being replayed.
+    """
+    output = CheckpointService.load(fingerprint, stage, params)
+    if not CheckpointService.is_missing(output) and (valid is None or valid(output)):
+        logger.info(f"Reusing {stage} checkpoint for {video_path}")
+    else:
+        output = compute()
+        if valid is not None and not valid(output):
+            logger.warning(f"{stage} for {video_path} did not complete cleanly, not checkpointing it")
+            return output
+        CheckpointService.save(fingerprint, stage, output, params)
+    CheckpointService.record_stage(video_path, fingerprint, stage)
+    return output
 
 @flow(name="video_processing_pipeline")
-def video_processing_flow(video_path: str, output_dir: str, ad_goal: str = None):
+def video_processing_flow(video_path: str, output_dir: str, ad_goal: str = None, force_from_step: Optional[str] = None):
+    """
+    Process one video. Each stage's output is checkpointed by the video's
+    content fingerprint and PIPELINE_VERSION, so a re-run resumes after the
+    last completed stage. force_from_step ("analysis"/"scoring"/"clips" or
+    step 1/3/5) discards that stage's checkpoint and every later one.
+    """
     logger = get_run_logger()
     logger.info(f"Starting processing for {video_path} with goal: {ad_goal}")
     
+    fingerprint = content_fingerprint(video_path)
+    force_stage = resolve_stage(force_from_step)
+    if force_stage:
+        removed = CheckpointService.invalidate_from(fingerprint, force_stage)
+        logger.info(f"Forcing re-run from {force_stage} ({removed} checkpoints dropped)")
+    
     # 1. Content Analysis (includes AI Filtering)
-    analysis_result = analyze_content(video_path, ad_goal=ad_goal)
+    analysis_result = _run_stage(
+        "analysis", video_path, fingerprint, {"ad_goal": ad_goal},
+        lambda: analyze_content(video_path, ad_goal=ad_goal), logger,
+        valid=_analysis_complete
+    )
     logger.info(f"Analysis complete: {analysis_result}")
     
     # Check Filter Status
@@ -64,16 +107,6 @@ def video_processing_flow(video_path: str, output_dir: str, ad_goal: str = None)
             "clips": []
         }
     
-    # In real flow, Step 2 would produce this list based on Step 1
-    # For now, we rely on Step 1 output if it returns timeline, or we parse it.
-    # To fully remove mock, Step 1 should return structured data.
-    # Let's assume Step 1 returns a list or valid dict.
-    # If Step 1 is still unimplemented fully, we might still have a partial placeholder, 
-    # but the USER asked to remove mocks. 
-    # So we should pass analysis_result to Step 3 if Step 3 can handle it.
-    # However, Step 3 expects list of segments.
-    # Let's verify what analyze_content returns.
-    
     timeline = analysis_result.get("segments", [])
     if not timeline:
         # Fallback or error if AI failed to find segments
@@ -81,18 +114,172 @@ def video_processing_flow(video_path: str, output_dir: str, ad_goal: str = None)
         timeline = [{"start": 0, "end": 10, "topic": "default"}]
 
     
-    # 3. Scoring
-    scored_segments = score_segments(timeline)
+    # 3. Scoring (keyed on its input too, so a changed analysis never reuses stale scores)
+    scored_segments = _run_stage(
+        "scoring", video_path, fingerprint, {"input": _digest(timeline)},
+        lambda: score_segments(timeline), logger,
+        valid=_scores_complete
+    )
     
     # 4. Filter High Quality
 
-    high_quality_segments = [s for s in scored_segments if s['score'] > 8]
+    high_quality_segments = [s for s in scored_segments if s['score'] > CLIP_MIN_SCORE]
     
-    # 5. Generate Clips
-    final_clips = generate_clips(video_path, high_quality_segments, output_dir)
+    # 5. Generate Clips (re-generated if any clip file has gone missing)
+    final_clips = _run_stage(
+        "clips", video_path, fingerprint, {"input": _digest(high_quality_segments), "output_dir": output_dir},
+        lambda: generate_clips(video_path, high_quality_segments, output_dir), logger,
+        valid=_clips_exist
+    )
     
     return final_clips
 
+@task
+def fingerprint_video(video_path: str) -> str:
+    return content_fingerprint(video_path)
+
+@task
+def analyze_checkpointed(video_path: str, fingerprint: str, ad_goal: str = None) -> Dict:
+    """Step 1 for process_batch_flow, through the same checkpoints as video_processing_flow"""
+    logger = get_run_logger()
+    
+    def compute():
+        with borrow_services("analyze_content", logger) as services:
+            return run_async(services.step1.run(video_path, ad_goal=ad_goal))
+    
+    return _run_stage("analysis", video_path, fingerprint, {"ad_goal": ad_goal}, compute, logger,
+                      valid=_analysis_complete)
+
+@task
+def score_analysis(video_path: str, fingerprint: str, analysis_result: Dict) -> Dict:
+    """Step 3 for one analysed video: {"status": "filtered", ...} or {"status": "scored", "segments": [...]}"""
+    if analysis_result.get("filter_status") == "rejected":
+        return {"status": "filtered", "reason": analysis_result.get("reason", "Filtered by AI")}
+    
+    timeline = analysis_result.get("segments", [])
+    if not timeline:
+        timeline = [{"start": 0, "end": 10, "topic": "default"}]
+    logger = get_run_logger()
+    
+    def compute():
+        with borrow_services("score_analysis", logger) as services:
+            return run_async(services.step3.run(timeline))
+    
+    segments = _run_stage("scoring", video_path, fingerprint, {"input": _digest(timeline)}, compute, logger,
+                          valid=_scores_complete)
+    return {"status": "scored", "segments": segments}
+
+_clip_step = None
+
+def _generate_clips_in_process(video_path: str, segments: List[Dict], output_dir: str) -> List:
+    """Step 5 in a process-pool worker (ffmpeg-bound, so one video per CPU)"""
+    global _clip_step
+    if _clip_step is None:
+        from backend.services.video_processor import VideoProcessor
+        from backend.pipeline.step5_video import Step5VideoGeneration
+        _clip_step = Step5VideoGeneration(VideoProcessor())
+    return asyncio.run(_clip_step.run(video_path, segments, output_dir))
+
+@flow(name="process_batch_flow", task_runner=ThreadPoolTaskRunner(max_workers=PROCESS_AI_WORKERS))
+def process_batch_flow(video_paths: List[str],
+                       output_dir: str,
+                       ad_goal: str = None,
+                       ffmpeg_workers: Optional[int] = None,
+                       min_score: float = CLIP_MIN_SCORE):
+    """
+    Process many videos at once.
+
+    Analysis and scoring are AI-bound and run as tasks on the flow's thread
+    pool (PROCESS_AI_WORKERS threads, or ai_max_concurrency when started via
+    batch_flow_for_settings; the shared provider pool enforces the
+    API's concurrency and rate limits across all of them). Clip generation
+    is ffmpeg-bound and runs in a process pool of `ffmpeg_workers` (default:
+    CPU count). A video moves to the next stage as soon as its previous one
+    finishes; the result is aggregated per video. Stage outputs are
+    checkpointed like in video_processing_flow, so a re-run resumes.
+    """
+    logger = get_run_logger()
+    paths = list(dict.fromkeys(video_paths))
+    logger.info(f"Processing {len(paths)} videos")
+    
+    results = {path: {"video_path": path, "status": "pending", "clips": [], "started": time.monotonic()} for path in paths}
+    
+    def finish(path: str, status: str, **fields):
+        result = results[path]
+        result.update(status=status, elapsed_sec=round(time.monotonic() - result.pop("started"), 2), **fields)
+        logger.info(f"{path}: {status}")
+    
+    # Stages 1 + 3 on the thread pool; each task waits on its own video's previous stage only.
+    # Stages go through the same checkpoints as video_processing_flow, so a re-run resumes.
+    fingerprints = {path: fingerprint_video.submit(path) for path in paths}
+    analyses = {path: analyze_checkpointed.submit(path, fingerprints[path], ad_goal=ad_goal) for path in paths}
+    scores = {score_analysis.submit(path, fingerprints[path], analyses[path]): path for path in paths}
+    
+    workers = ffmpeg_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        clips = {}
+        for future in as_completed(list(scores)):
+            path = scores[future]
+            try:
+                scored = future.result()
+            except Exception as e:
+                if fingerprints[path].state.is_failed():
+                    failed_stage = "fingerprint"
+                else:
+                    failed_stage = "analysis" if analyses[path].state.is_failed() else "scoring"
+                finish(path, "failed", stage=failed_stage, error=str(e))
+                continue
+            
+            if scored["status"] == "filtered":
+                finish(path, "filtered", reason=scored["reason"])
+                continue
+            
+            selected = [seg for seg in scored["segments"] if seg["score"] > min_score]
+            results[path]["segments_scored"] = len(scored["segments"])
+            if not selected:
+                finish(path, "completed")
+                continue
+            
+            # Stage 5 in the process pool, unless its checkpoint is still backed by the files
+            video_output = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0])
+            fingerprint = fingerprints[path].result()
+            params = {"input": _digest(selected), "output_dir": video_output}
+            cached = CheckpointService.load(fingerprint, "clips", params)
+            if not CheckpointService.is_missing(cached) and _clips_exist(cached):
+                logger.info(f"Reusing clips checkpoint for {path}")
+                CheckpointService.record_stage(path, fingerprint, "clips")
+                finish(path, "completed", clips=cached)
+                continue
+            future = pool.submit(_generate_clips_in_process, path, selected, video_output)
+            clips[future] = (path, fingerprint, params)
+        
+        for future in concurrent.futures.as_completed(clips):
+            path, fingerprint, params = clips[future]
+            try:
+                generated = future.result()
+            except Exception as e:
+                finish(path, "failed", stage="clips", error=str(e))
+                continue
+            CheckpointService.save(fingerprint, "clips", generated, params)
+            CheckpointService.record_stage(path, fingerprint, "clips")
+            finish(path, "completed", clips=generated)
+    
+    videos = [results[path] for path in paths]
+    summary = {}
+    for video in videos:
+        summary[video["status"]] = summary.get(video["status"], 0) + 1
+    logger.info(f"Batch processing finished: {summary}")
+    return {"videos": videos, "summary": summary}
+
+def batch_flow_for_settings(settings: Optional[SettingsModel] = None):
+    """
+    process_batch_flow with one AI task thread per request the provider may
+    have in flight, so the thread pool and the provider pool stay in step.
+    """
+    settings = settings or ConfigService.load_settings()
+    workers = max(1, settings.ai_max_concurrency)
+    return process_batch_flow.with_options(task_runner=ThreadPoolTaskRunner(max_workers=workers))
+
 if __name__ == "__main__":
     # Local test
     # video_processing_flow("test.mp4", "./output")
@@ -61,7 +61,7 @@ const BatchDownloadTab: React.FC = () => {
         setRunning(true);
         try {
             const response = await axios.post(`${getApiUrl()}/download/batch/run`);
-            message.success(`Submitted ${response.data.count} download tasks`);
+            message.success(`Submitted batch of ${response.data.count} links (${response.data.skipped} already downloaded)`);
         } catch (error: unknown) {
             console.error('Failed to run batch download:', error);
             const errMsg = (error as { response?: { data?: { detail?: string } } })?.response?.data?.detail || 'Failed to run batch download';
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { Card, Table, Input, Button, Space, Statistic, Row, Col, message, Popconfirm, Tag } from 'antd';
 import { ReloadOutlined, DeleteOutlined, ExportOutlined, SyncOutlined, SearchOutlined } from '@ant-design/icons';
 import axios from 'axios';
@@ -29,15 +29,24 @@ const DownloadArchiveTab: React.FC = () => {
     const [page, setPage] = useState(1);
     const [pageSize] = useState(20);
     const [search, setSearch] = useState('');
+    // page number -> cursor that starts it (from the previous page's next_cursor)
+    const pageCursors = useRef<Record<number, string>>({});
 
     const fetchEntries = useCallback(async (skip = 0, searchTerm = '') => {
         setLoading(true);
         try {
+            const pageNumber = Math.floor(skip / pageSize) + 1;
+            const cursor = pageCursors.current[pageNumber];
             const response = await axios.get(`${getApiUrl()}/materials/archive`, {
-                params: { skip, limit: pageSize, search: searchTerm || undefined }
+                params: cursor
+                    ? { cursor, limit: pageSize, search: searchTerm || undefined }
+                    : { skip, limit: pageSize, search: searchTerm || undefined }
             });
             setEntries(response.data.entries);
             setTotal(response.data.total);
+            if (response.data.next_cursor) {
+                pageCursors.current[pageNumber + 1] = response.data.next_cursor;
+            }
         } catch (error) {
             console.error('Failed to fetch archive entries:', error);
             message.error('Failed to load archive');
@@ -66,6 +75,7 @@ const DownloadArchiveTab: React.FC = () => {
     };
 
     const handleSearch = () => {
+        pageCursors.current = {};
         setPage(1);
         fetchEntries(0, search);
     };
@@ -86,6 +96,7 @@ const DownloadArchiveTab: React.FC = () => {
         try {
             const response = await axios.delete(`${getApiUrl()}/materials/archive`);
             message.success(`Cleared ${response.data.count} entries`);
+            pageCursors.current = {};
             setEntries([]);
             setTotal(0);
             fetchStatus();
@@ -1,5 +1,5 @@
 import React from 'react';
-import { Form, Input, Button, Select, Row, Col, Space } from 'antd';
+import { Form, Input, InputNumber, Button, Select, Row, Col, Space } from 'antd';
 import { ApiOutlined } from '@ant-design/icons';
 import type { FormInstance } from 'antd/es/form';
 
@@ -8,6 +8,9 @@ interface SettingsValues {
     api_base?: string;
     api_key?: string;
     vl_model?: string;
+    ai_max_concurrency?: number;
+    ai_rpm_limit?: number | null;
+    ai_tpm_limit?: number | null;
 }
 
 interface AIConfigTabProps {
@@ -22,7 +25,8 @@ const AIConfigTab: React.FC<AIConfigTabProps> = ({ form, testing, onSave, onTest
         <Form layout="vertical" onFinish={onSave} form={form} initialValues={{
             vendor: 'custom',
             api_base: 'https://api.openai.com/v1',
-            vl_model: 'gpt-4-vision-preview'
+            vl_model: 'gpt-4-vision-preview',
+            ai_max_concurrency: 8
         }}>
             <Row gutter={16}>
                 <Col span={8}>
@@ -64,6 +68,24 @@ const AIConfigTab: React.FC<AIConfigTabProps> = ({ form, testing, onSave, onTest
                 <Input placeholder="e.g., gpt-4-turbo, Qwen/Qwen2.5-VL-72B-Instruct" />
             </Form.Item>
 
+            <Row gutter={16}>
+                <Col span={8}>
+                    <Form.Item name="ai_max_concurrency" label="Max Concurrent Requests" rules={[{ required: true }]}>
+                        <InputNumber min={1} max={128} style={{ width: '100%' }} />
+                    </Form.Item>
+                </Col>
+                <Col span={8}>
+                    <Form.Item name="ai_rpm_limit" label="Requests / Minute" tooltip="Leave empty for no limit">
+                        <InputNumber min={1} style={{ width: '100%' }} placeholder="Unlimited" />
+                    </Form.Item>
+                </Col>
+                <Col span={8}>
+                    <Form.Item name="ai_tpm_limit" label="Tokens / Minute" tooltip="Leave empty for no limit">
+                        <InputNumber min={1} style={{ width: '100%' }} placeholder="Unlimited" />
+                    </Form.Item>
+                </Col>
+            </Row>
+
             <Form.Item>
                 <Space>
                     <Button type="primary" htmlType="submit">Save Configuration</Button>
@@ -14,6 +14,9 @@ interface SettingsValues {
     api_key?: string;
     vl_model?: string;
     cookies_path?: string;
+    ai_max_concurrency?: number;
+    ai_rpm_limit?: number | null;
+    ai_tpm_limit?: number | null;
 }
 
 const Settings: React.FC = () => {
@@ -45,7 +48,10 @@ const Settings: React.FC = () => {
                         vendor: data.vendor,
                         api_base: data.api_base,
                         api_key: data.api_key,
-                        vl_model: data.vl_model
+                        vl_model: data.vl_model,
+                        ai_max_concurrency: data.ai_max_concurrency,
+                        ai_rpm_limit: data.ai_rpm_limit,
+                        ai_tpm_limit: data.ai_tpm_limit
                     });
 
                     let loadedPath = '/app/data/cookies.txt';
@@ -131,7 +137,10 @@ const Settings: React.FC = () => {
                     api_key: values.api_key,
                     api_base: values.api_base,
                     vendor: values.vendor || 'custom',
-                    vl_model: values.vl_model
+                    vl_model: values.vl_model,
+                    ai_max_concurrency: values.ai_max_concurrency,
+                    ai_rpm_limit: values.ai_rpm_limit ?? null,
+                    ai_tpm_limit: values.ai_tpm_limit ?? null
                 }),
             });
 
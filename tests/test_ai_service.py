@@ -0,0 +1,227 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+openai = pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("ffmpeg")
+
+from backend.services import ai_service
+from backend.services.ai_cache import AIResponseCache, MemoryBackend
+from backend.services.ai_service import AIService, AIProviderConfig, TokenBucket, get_provider_pool
+from backend.pipeline.step3_scoring import Step3Scoring
+
+
+def _completion(content):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+    }
+
+
+class StubServer:
+    """
+    Minimal OpenAI-compatible /chat/completions endpoint. Scripted responses
+    are served first, then `default`; every request is counted, and the peak
+    number of requests in flight is tracked.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.script = []
+        self.default = (200, {}, _completion("7"))
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    status, headers, body = stub.script.pop(0) if stub.script else stub.default
+                try:
+                    time.sleep(stub.delay)
+                    payload = json.dumps(body).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(payload)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def _service(stub: StubServer, **overrides) -> AIService:
+    config = AIProviderConfig(provider_name="test", api_base=stub.url, api_key="test-key",
+                              model_name="test-model", **overrides)
+    return AIService(config, cache=AIResponseCache(backend=MemoryBackend()))
+
+
+def _error(message: str):
+    return {"error": {"message": message, "type": "test_error"}}
+
+
+def test_rate_limit_retried_after_retry_after(stub):
+    stub.script = [(429, {"Retry-After": "1"}, _error("slow down"))]
+    service = _service(stub, max_retries=2)
+
+    started = time.monotonic()
+    assert asyncio.run(service.generate_text("score this")) == "7"
+    assert stub.requests == 2
+    assert time.monotonic() - started >= 1.0
+
+
+def test_server_errors_retried_until_max_retries(stub):
+    stub.default = (500, {}, _error("boom"))
+    service = _service(stub, max_retries=1)
+
+    with pytest.raises(openai.InternalServerError):
+        asyncio.run(service.generate_text("score this"))
+    assert stub.requests == 2
+
+
+def test_client_errors_not_retried(stub):
+    stub.default = (400, {}, _error("bad request"))
+    service = _service(stub, max_retries=3)
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(service.generate_text("score this"))
+    assert stub.requests == 1
+
+
+def test_empty_content_not_cached(stub):
+    stub.default = (200, {}, _completion(None))
+    service = _service(stub)
+
+    async def twice():
+        return [await service.generate_text("score this") for _ in range(2)]
+
+    assert asyncio.run(twice()) == ["", ""]
+    assert stub.requests == 2
+
+
+def test_rejected_reply_not_cached(stub):
+    stub.script = [(200, {}, _completion("I can't rate that"))]
+    service = _service(stub)
+
+    async def three():
+        return [await service.generate_text("score this", accept=str.isdigit) for _ in range(3)]
+
+    # The bad reply is retried, the good one is served from the cache
+    assert asyncio.run(three()) == ["I can't rate that", "7", "7"]
+    assert stub.requests == 2
+
+
+def test_scoring_recovers_from_unparseable_reply(stub):
+    stub.script = [(200, {}, _completion("n/a"))]
+    step = Step3Scoring(_service(stub))
+    timeline = [{"start": 0.0, "end": 4.0, "topic": "unboxing"}]
+
+    (first,) = asyncio.run(step.run(timeline))
+    (second,) = asyncio.run(step.run(timeline))
+    assert (first["score"], first["score_fallback"]) == (5.0, True)
+    assert (second["score"], second["score_fallback"]) == (7.0, False)
+
+
+def test_analyze_images_cache_hit_skips_frame_packing(stub, monkeypatch):
+    packed = []
+
+    class CountingPacker:
+        def resize(self, jpegs, tile_size):
+            packed.append(len(jpegs))
+            return jpegs
+
+    monkeypatch.setattr(ai_service, "FramePacker", CountingPacker)
+    service = _service(stub)
+
+    async def twice():
+        return [await service.analyze_images([b"jpeg-1", b"jpeg-2"], prompt="describe") for _ in range(2)]
+
+    assert asyncio.run(twice()) == ["7", "7"]
+    assert stub.requests == 1
+    assert packed == [2]
+
+
+def test_semaphore_caps_requests_in_flight(stub):
+    stub.delay = 0.2
+    service = _service(stub, max_concurrency=2)
+
+    async def burst():
+        return await asyncio.gather(*(service.generate_text(f"segment {i}") for i in range(6)))
+
+    assert asyncio.run(burst()) == ["7"] * 6
+    assert stub.requests == 6
+    assert stub.max_in_flight == 2
+
+
+def test_pool_rebuilt_when_limits_change(stub):
+    config = _service(stub, max_concurrency=2).config
+
+    async def pools():
+        first = get_provider_pool(config)
+        same = get_provider_pool(config)
+        changed = get_provider_pool(config.model_copy(update={"max_concurrency": 4, "rpm_limit": 120}))
+        return first, same, changed
+
+    first, same, changed = asyncio.run(pools())
+    assert same is first
+    assert changed is not first
+    assert changed.rpm is not None and changed.rpm.capacity == 120
+
+
+def test_token_bucket_waits_for_refill():
+    async def drain():
+        bucket = TokenBucket(60)  # one token per second
+        started = time.monotonic()
+        await bucket.acquire(60)
+        full = time.monotonic() - started
+        await bucket.acquire(1)
+        return full, time.monotonic() - started
+
+    full, refilled = asyncio.run(drain())
+    assert full < 0.1
+    assert refilled >= 0.9
+
+
+def test_token_bucket_clamps_oversized_requests():
+    async def oversized():
+        bucket = TokenBucket(10)
+        started = time.monotonic()
+        await bucket.acquire(1000)
+        return time.monotonic() - started
+
+    assert asyncio.run(oversized()) < 0.1
@@ -0,0 +1,48 @@
+import threading
+
+from backend.services.archive_file import ArchiveFileWriter
+
+
+def _lines(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def test_append_and_rewrite(tmp_path):
+    writer = ArchiveFileWriter(str(tmp_path / "archive.txt"))
+    writer.append("youtube", "a")
+    writer.append("tiktok", "b")
+    assert _lines(writer.path) == ["youtube a", "tiktok b"]
+
+    assert writer.rewrite([("tiktok", "b")]) == 1
+    writer.append("youtube", "c")
+    assert _lines(writer.path) == ["tiktok b", "youtube c"]
+    writer.close()
+
+
+def test_appends_from_another_writer_survive_compaction(tmp_path):
+    # Two writers on one path stand in for two worker processes: only the file lock is shared
+    path = str(tmp_path / "archive.txt")
+    appender, compactor = ArchiveFileWriter(path), ArchiveFileWriter(path)
+    source = []  # source of truth, updated before each append like the database
+    done = threading.Event()
+
+    def rows():
+        # Read under the file lock, like the streamed query in ArchiveService._sync_to_file
+        yield from list(source)
+
+    def append_all():
+        for i in range(2000):
+            source.append(("tiktok", str(i)))
+            appender.append("tiktok", str(i))
+        done.set()
+
+    thread = threading.Thread(target=append_all)
+    thread.start()
+    while not done.is_set():
+        compactor.rewrite(rows())
+    thread.join()
+    appender.close()
+    compactor.close()
+
+    assert set(_lines(path)) == {f"tiktok {i}" for i in range(2000)}
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg2")
+
+from backend.services.archive_filter import BloomFilter, extract_video_id
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    ids = [f"video-{i}" for i in range(1000)]
+    for video_id in ids:
+        bloom.add(video_id)
+    assert all(video_id in bloom for video_id in ids)
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"video-{i}")
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    # Sized for 1%; allow some slack for this particular set of ids
+    assert false_positives < 300
+
+
+def test_extract_video_id():
+    assert extract_video_id("https://www.tiktok.com/@someone/video/7301234567890123456?lang=en") == "7301234567890123456"
+    assert extract_video_id("https://youtu.be/dQw4w9WgXcQ") == "dQw4w9WgXcQ"
+    assert extract_video_id("https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ") == "dQw4w9WgXcQ"
+    assert extract_video_id("https://www.tiktok.com/@someone") is None
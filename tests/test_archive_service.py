@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg2")
+
+from backend.services.archive_service import ArchiveService
+
+
+def test_cursor_round_trip():
+    downloaded_at = datetime(2026, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    cursor = ArchiveService._encode_cursor(downloaded_at, 42)
+    assert ArchiveService._decode_cursor(cursor) == (downloaded_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "W10=", "WyJub3QgYSBkYXRlIiwgMV0="])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        ArchiveService._decode_cursor(cursor)
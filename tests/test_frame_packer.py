@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("ffmpeg")
+
+from backend.services.frame_packer import split_jpeg_stream
+
+
+def _jpeg(payload: bytes) -> bytes:
+    """Structurally valid JPEG: SOI, a DQT segment, SOS header + entropy data, EOI"""
+    dqt = b"\xff\xdb" + (2 + len(payload)).to_bytes(2, "big") + payload
+    sos = b"\xff\xda\x00\x08\x01\x01\x00\x00\x3f\x00"
+    # Stuffed 0xFF00 and a restart marker inside the scan must not end the frame
+    scan = b"\x12\xff\x00\x34\xff\xd3\x56"
+    return b"\xff\xd8" + dqt + sos + scan + b"\xff\xd9"
+
+
+def test_split_jpeg_stream():
+    # An FFD9 inside the table payload is not an end-of-image marker
+    frames = [_jpeg(b"\x00\xff\xd9\x01"), _jpeg(b"\x02\x03")]
+    assert split_jpeg_stream(b"".join(frames)) == frames
+
+
+def test_split_jpeg_stream_drops_truncated_frame():
+    frame = _jpeg(b"\x00")
+    assert split_jpeg_stream(frame + frame[:-4]) == [frame]
+    # Cut right after the 0xFF of the EOI marker
+    assert split_jpeg_stream(frame + frame[:-1]) == [frame]
+    assert split_jpeg_stream(b"") == []
@@ -0,0 +1,37 @@
+from backend.services.keyword_automaton import KeywordAutomaton, normalize_text
+
+
+def _found(automaton, text):
+    return [(m.keyword, m.category, text[m.start:m.end]) for m in automaton.scan(text)]
+
+
+def test_overlapping_keywords():
+    automaton = KeywordAutomaton([("he", "a"), ("she", "b"), ("his", "c"), ("hers", "d")])
+    assert sorted(_found(automaton, "ushers")) == [("he", "a", "he"), ("hers", "d", "hers"), ("she", "b", "she")]
+
+
+def test_failure_links_follow_suffixes():
+    automaton = KeywordAutomaton([("abcd", "x"), ("bce", "y")])
+    assert _found(automaton, "abce") == [("bce", "y", "bce")]
+
+
+def test_width_case_and_script_are_normalized():
+    automaton = KeywordAutomaton([("free", "negative"), ("优惠", "positive")])
+    text = "ＦＲＥＥ shipping, 限時優惠"
+    assert _found(automaton, text) == [("free", "negative", "ＦＲＥＥ"), ("优惠", "positive", "優惠")]
+
+
+def test_offsets_map_back_to_original_text():
+    automaton = KeywordAutomaton([("ﬁx", "k")])
+    # The ligature expands to two chars when normalized; the match spans the original one
+    text = "quick ﬁx"
+    (match,) = automaton.scan(text)
+    assert (match.start, match.end) == (6, 8)
+    assert normalize_text("ﬁ") == "fi"
+
+
+def test_empty_keywords_and_text():
+    automaton = KeywordAutomaton([("", "x"), ("  ", "y")])
+    assert automaton.size == 0
+    assert automaton.scan("anything") == []
+    assert KeywordAutomaton([("a", "x")]).scan("") == []
@@ -0,0 +1,56 @@
+from backend.services.kw_detector import KeywordDetector, detect_timeline
+
+# (timestamp, text, source[, end]) events of a short video
+TRANSCRIPT = [
+    (0.0, "welcome back to the channel", "transcript", 2.0),
+    (2.5, "today's deal: free shipping", "transcript", 4.0),
+    (3.0, "ＦＲＥＥ", "ocr"),
+    (5.0, "free returns too", "transcript", 6.0),
+    (9.0, "限時優惠", "ocr"),
+    (12.0, "and a free gift", "transcript", 13.0),
+]
+
+
+def _detector():
+    return KeywordDetector(positive_keywords=["deal", "优惠"], negative_keywords=["free"])
+
+
+def _summary(intervals):
+    return sorted((iv["keyword"], iv["start"], iv["end"], iv["hits"], tuple(iv["sources"])) for iv in intervals)
+
+
+def test_hits_merged_within_max_gap():
+    intervals = list(detect_timeline(_detector(), TRANSCRIPT, max_gap=1.5))
+    assert _summary(intervals) == [
+        ("deal", 2.5, 4.0, 1, ("transcript",)),
+        # 3.0 (OCR) and 5.0 are within 1.5s of the open interval's end; 12.0 is not
+        ("free", 2.5, 6.0, 3, ("ocr", "transcript")),
+        ("free", 12.0, 13.0, 1, ("transcript",)),
+        ("优惠", 9.0, 9.0, 1, ("ocr",)),
+    ]
+
+
+def test_intervals_emitted_once_they_cannot_grow():
+    timeline = _detector().timeline(max_gap=1.5)
+    closed = [timeline.feed(*event) for event in TRANSCRIPT]
+    assert [_summary(c) for c in closed[:4]] == [[], [], [], []]
+    # 9.0 is more than 1.5s past both "deal" (4.0) and "free" (6.0)
+    assert [iv["keyword"] for iv in closed[4]] == ["deal", "free"]
+    assert [iv["keyword"] for iv in closed[5]] == ["优惠"]
+    assert _summary(timeline.flush()) == [("free", 12.0, 13.0, 1, ("transcript",))]
+    assert timeline.flush() == []
+
+
+def test_gap_equal_to_max_gap_still_merges():
+    events = [(1.0, "free", "ocr"), (2.0, "free", "ocr"), (3.5, "free", "ocr")]
+    assert _summary(detect_timeline(_detector(), events, max_gap=1.5)) == [("free", 1.0, 3.5, 3, ("ocr",))]
+    assert len(list(detect_timeline(_detector(), events, max_gap=1.0))) == 2
+
+
+def test_late_event_extends_interval_start():
+    events = [(4.0, "free", "ocr"), (3.0, "free", "transcript", 3.5)]
+    assert _summary(detect_timeline(_detector(), events)) == [("free", 3.0, 4.0, 2, ("ocr", "transcript"))]
+
+
+def test_no_hits():
+    assert list(detect_timeline(_detector(), [(0.0, "nothing here", "ocr"), (1.0, "", "ocr")])) == []
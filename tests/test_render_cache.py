@@ -0,0 +1,44 @@
+import os
+
+from backend.services import render_cache as render_cache_module
+from backend.services.render_cache import RenderCache
+
+
+def _store(cache, tmp_path, key, size):
+    rendered = cache.temp_path(".mp4")
+    with open(rendered, "wb") as f:
+        f.write(b"\0" * size)
+    cache.store(key, rendered, str(tmp_path / "out" / f"{key}.mp4"))
+    return cache.artifact_path(key, ".mp4")
+
+
+def test_stores_walk_the_cache_only_when_over_budget(tmp_path, monkeypatch):
+    walks = []
+    real_walk = os.walk
+    monkeypatch.setattr(render_cache_module.os, "walk", lambda path: walks.append(path) or real_walk(path))
+    cache = RenderCache(cache_dir=str(tmp_path / "cache"), max_bytes=250)
+
+    first = _store(cache, tmp_path, "a" * 64, 100)
+    assert len(walks) == 1  # the first store establishes the running total
+    second = _store(cache, tmp_path, "b" * 64, 100)
+    assert len(walks) == 1
+
+    os.utime(first, (1, 1))  # least recently used
+    third = _store(cache, tmp_path, "c" * 64, 100)
+    assert len(walks) == 2
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(third)
+
+
+def test_stale_total_is_rescanned(tmp_path):
+    cache = RenderCache(cache_dir=str(tmp_path / "cache"), max_bytes=250, rescan_interval=0.0)
+    _store(cache, tmp_path, "a" * 64, 100)
+    # Another worker's artifact, invisible to the running total
+    other = cache.artifact_path("d" * 64, ".mp4")
+    os.makedirs(os.path.dirname(other), exist_ok=True)
+    with open(other, "wb") as f:
+        f.write(b"\0" * 200)
+    os.utime(other, (1, 1))
+
+    _store(cache, tmp_path, "b" * 64, 10)
+    assert not os.path.exists(other)
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("ffmpeg")
+pytest.importorskip("openai")
+
+from backend.pipeline.step1_outline import Step1ContentAnalysis
+
+
+class _Shots:
+    """Video processor double returning fixed shots"""
+
+    def __init__(self, shots):
+        self.shots = shots
+
+    def detect_scenes(self, video_path):
+        if self.shots is None:
+            raise RuntimeError("scene detection failed")
+        return self.shots
+
+    def get_video_info(self, video_path):
+        return {"duration": 6.0}
+
+
+def test_select_shots_merges_shortest_into_shorter_neighbour():
+    shots = [{"start": 0.0, "end": 4.0}, {"start": 4.0, "end": 5.0},
+             {"start": 5.0, "end": 7.0}, {"start": 7.0, "end": 12.0}]
+    step = Step1ContentAnalysis(None, _Shots(shots), max_frames=2)
+    # 4-5 joins 5-7 (the shorter neighbour), then the new 4-7 joins 0-4
+    assert step._select_shots("video.mp4") == [{"start": 0.0, "end": 7.0}, {"start": 7.0, "end": 12.0}]
+    # The detector's shots are left untouched
+    assert len(shots) == 4
+
+
+def test_select_shots_keeps_one_shot_with_no_frame_budget():
+    shots = [{"start": 0.0, "end": 1.0}, {"start": 1.0, "end": 3.0}]
+    step = Step1ContentAnalysis(None, _Shots(shots), max_frames=0)
+    assert step._select_shots("video.mp4") == [{"start": 0.0, "end": 3.0}]
+
+
+def test_uniform_fallback_with_no_frame_budget():
+    step = Step1ContentAnalysis(None, _Shots(None), max_frames=0)
+    assert step._select_shots("video.mp4") == [{"start": 0.0, "end": 6.0}]
+
+
+def test_pair_frames_merges_shots_sharing_a_frame():
+    a, b = b"frame-a", b"frame-b"
+    shots = [{"start": 0.0, "end": 0.02}, {"start": 0.02, "end": 0.04}, {"start": 0.04, "end": 3.0}]
+    step = Step1ContentAnalysis(None, None)
+    paired_shots, frames = step._pair_frames(shots, [a, a, b])
+    assert paired_shots == [{"start": 0.0, "end": 0.04}, {"start": 0.04, "end": 3.0}]
+    assert frames == [a, b]
+
+
+def test_pair_frames_folds_shots_past_the_last_frame():
+    shots = [{"start": 0.0, "end": 2.0}, {"start": 2.0, "end": 5.0}, {"start": 5.0, "end": 9.0}]
+    step = Step1ContentAnalysis(None, None)
+    paired_shots, frames = step._pair_frames(shots, [b"a", b"b"])
+    assert paired_shots == [{"start": 0.0, "end": 2.0}, {"start": 2.0, "end": 9.0}]
+    assert frames == [b"a", b"b"]
@@ -0,0 +1,76 @@
+import shutil
+
+import pytest
+
+ffmpeg = pytest.importorskip("ffmpeg")
+
+from backend.services.probe_cache import ProbeCache
+from backend.services.render_cache import RenderCache
+from backend.services.video_processor import VideoProcessor, snap_to_keyframe, select_pieces
+
+# Keyframes every 2s over a 60s source
+KEYFRAMES = [float(t) for t in range(0, 60, 2)]
+
+
+def _split(boundaries, duration=60.0):
+    """Pieces the segment muxer writes: each boundary moves to the first keyframe at or after it"""
+    cuts = sorted({next(k for k in KEYFRAMES + [duration] if k >= b) for b in boundaries})
+    edges = [0.0] + cuts + [duration]
+    return [(f"part_{i:04d}", edges[i], edges[i + 1]) for i in range(len(edges) - 1)]
+
+
+def test_snap_to_keyframe():
+    assert snap_to_keyframe(31.2, KEYFRAMES) == 30.0
+    assert snap_to_keyframe(32.0, KEYFRAMES) == 32.0
+    assert snap_to_keyframe(0.4, KEYFRAMES) == 0.0
+    assert snap_to_keyframe(5.0, []) == 0.0
+
+
+def test_select_pieces_starts_at_the_keyframe_before_start():
+    start = snap_to_keyframe(31.2, KEYFRAMES)
+    parts = _split([start, 40.5])
+    assert select_pieces(parts, start, 40.5) == ["part_0001"]
+    assert parts[1][1:] == (30.0, 42.0)
+
+
+def test_select_pieces_joins_pieces_split_by_other_segments():
+    segments = [(31.2, 40.5), (35.1, 50.0)]
+    starts = [snap_to_keyframe(s, KEYFRAMES) for s, _ in segments]
+    parts = _split(starts + [e for _, e in segments])
+    # Boundaries at 30, 34, 42, 50
+    assert select_pieces(parts, starts[0], 40.5) == ["part_0001", "part_0002"]
+    assert select_pieces(parts, starts[1], 50.0) == ["part_0002", "part_0003"]
+
+
+def test_select_pieces_segment_at_video_start():
+    parts = _split([10.0])
+    assert select_pieces(parts, snap_to_keyframe(0.0, KEYFRAMES), 10.0) == ["part_0000"]
+
+
+requires_ffmpeg = pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")),
+                                     reason="ffmpeg binaries not installed")
+
+
+@pytest.fixture
+def source(tmp_path):
+    """4s, 25 fps h264 with B-frames and a keyframe every second, plus audio"""
+    path = str(tmp_path / "source.mp4")
+    video = ffmpeg.input("testsrc=size=320x240:rate=25", f="lavfi", t=4)
+    audio = ffmpeg.input("sine=frequency=440", f="lavfi", t=4)
+    ffmpeg.output(video, audio, path, vcodec="libx264", pix_fmt="yuv420p", g=25, keyint_min=25,
+                  sc_threshold=0, acodec="aac").run(overwrite_output=True, quiet=True)
+    return path
+
+
+def _frame_count(path: str) -> int:
+    probe = ffmpeg.probe(path, select_streams="v:0", count_frames=None, show_entries="stream=nb_read_frames")
+    return int(probe["streams"][0]["nb_read_frames"])
+
+
+@requires_ffmpeg
+@pytest.mark.parametrize("start,end", [(1.2, 3.6), (0.4, 3.96), (1.0, 3.0)])
+def test_smart_cut_frame_count(source, tmp_path, start, end):
+    vp = VideoProcessor(probe_cache=ProbeCache(cache_dir=None), render_cache=RenderCache(enabled=False))
+    output = vp.smart_cut(source, start, end, str(tmp_path / "clip.mp4"))
+    # No frame is dropped or repeated where the copied middle meets the re-encoded edges
+    assert _frame_count(output) == round((end - start) * 25)